@@ -1,11 +1,18 @@
 ﻿from __future__ import annotations
 
+import hmac
+from dataclasses import dataclass
+from functools import lru_cache, wraps
+from typing import Any, AsyncIterator, Callable
+from weakref import WeakKeyDictionary
+
 from fastapi import Depends, Header, HTTPException, Request, status
 from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import Settings, get_settings
-from app.core.db import get_db_session
+from app.core.db import get_async_session_maker, get_session_maker
 from app.core.security import decode_access_token
 from app.models import Role, User
 from app.services.auth import AuthService, TenantService
@@ -14,56 +21,125 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
-def get_db() -> Session:
-    yield from get_db_session()
+def _memoize_callable_predicate(predicate: Callable[[Any], bool]) -> Callable[[Any], bool]:
+    cache: WeakKeyDictionary[Any, bool] = WeakKeyDictionary()
+
+    @wraps(predicate)
+    def _cached(call: Any) -> bool:
+        try:
+            return cache[call]
+        except KeyError:
+            pass
+        except TypeError:
+            # Not weak-referenceable (or unhashable); fall back to the uncached check.
+            return predicate(call)
+        result = cache[call] = predicate(call)
+        return result
+
+    _cached._memoized = True  # type: ignore[attr-defined]
+    return _cached
+
+
+def _install_dependency_introspection_cache() -> None:
+    # FastAPI re-inspects every dependency callable on each request to decide how to invoke it.
+    from fastapi.dependencies import utils as dependency_utils
+
+    for name in ("is_coroutine_callable", "is_gen_callable", "is_async_gen_callable"):
+        predicate = getattr(dependency_utils, name, None)
+        if predicate is None or getattr(predicate, "_memoized", False):
+            continue
+        setattr(dependency_utils, name, _memoize_callable_predicate(predicate))
+
+
+_install_dependency_introspection_cache()
+
+
+def get_db(request: Request) -> Session:
+    # Plain (non-generator) dependency; DatabaseSessionMiddleware closes the session.
+    session = get_session_maker()()
+    request.state.db = session
+    return session
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_session_maker()() as session:
+        yield session
+
+
+def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
+    return AuthService(db)
+
+
+def get_tenant_service(db: Session = Depends(get_db)) -> TenantService:
+    return TenantService(db)
 
 
 def current_user(
+    request: Request,
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    auth_service: AuthService = Depends(get_auth_service),
 ) -> User:
-    user_id = decode_access_token(token)
+    cached = getattr(request.state, "user", None)
+    if cached is not None:
+        return cached
+
+    user_id = getattr(request.state, "token_subject", None) or decode_access_token(token)
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    request.state.token_subject = user_id
 
-    user = AuthService(db).get_user_by_id(user_id)
+    user = auth_service.get_user_by_id(user_id)
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not active")
+    request.state.user = user
     return user
 
 
-def current_tenant_id(
+@dataclass(frozen=True)
+class TenantContext:
+    tenant_id: str
+    role: Role
+
+
+def current_tenant(
     tenant_id: str = Header(alias="X-Tenant-Id"),
     user: User = Depends(current_user),
-    db: Session = Depends(get_db),
-) -> str:
-    role = TenantService(db).role_for_user(user_id=user.id, tenant_id=tenant_id)
+    tenant_service: TenantService = Depends(get_tenant_service),
+) -> TenantContext:
+    role = tenant_service.role_for_user(user_id=user.id, tenant_id=tenant_id)
     if role is None:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Missing tenant membership")
-    return tenant_id
+    return TenantContext(tenant_id=tenant_id, role=role)
+
+
+def current_tenant_id(tenant: TenantContext = Depends(current_tenant)) -> str:
+    return tenant.tenant_id
 
 
 def require_role(*roles: Role):
-    allowed = set(roles)
-
-    def _checker(
-        tenant_id: str = Depends(current_tenant_id),
-        user: User = Depends(current_user),
-        db: Session = Depends(get_db),
-    ) -> str:
-        role = TenantService(db).role_for_user(user.id, tenant_id)
-        if role is None or role not in allowed:
+    return _role_checker(frozenset(roles))
+
+
+@lru_cache(maxsize=None)
+def _role_checker(allowed: frozenset[Role]):
+    def _checker(tenant: TenantContext = Depends(current_tenant)) -> str:
+        if tenant.role not in allowed:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role not permitted")
-        return tenant_id
+        return tenant.tenant_id
 
     return _checker
 
 
+def _secret_matches(candidate: str | None, expected: bytes) -> bool:
+    return hmac.compare_digest((candidate or "").encode("utf-8"), expected)
+
+
 def require_api_key(
     api_key: str | None = Depends(api_key_header),
     settings: Settings = Depends(get_settings),
 ) -> None:
-    if settings.api_key and api_key != settings.api_key:
+    expected = settings.api_key_bytes
+    if expected and not _secret_matches(api_key, expected):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key")
 
 
@@ -71,13 +147,14 @@ def require_operator_token(
     request: Request,
     settings: Settings = Depends(get_settings),
 ) -> None:
-    if not settings.operator_token:
+    expected = settings.operator_token_bytes
+    if not expected:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Operator mode disabled",
         )
     token = request.headers.get(settings.operator_header_name)
-    if token != settings.operator_token:
+    if not _secret_matches(token, expected):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid operator token")
 
 
@@ -85,8 +162,9 @@ def require_operator_token_if_configured(
     request: Request,
     settings: Settings = Depends(get_settings),
 ) -> None:
-    if not settings.operator_token:
+    expected = settings.operator_token_bytes
+    if not expected:
         return
     token = request.headers.get(settings.operator_header_name)
-    if token != settings.operator_token:
+    if not _secret_matches(token, expected):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid operator token")
@@ -1,16 +1,24 @@
 ﻿from __future__ import annotations
 
-import json
+import base64
+import time
+from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
-from sqlalchemy import select, text
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Query, Response, UploadFile, status
+from pydantic import TypeAdapter
+from sqlalchemy import Select, and_, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api.deps import (
     current_tenant_id,
     current_user,
+    get_async_db,
+    get_auth_service,
     get_db,
+    get_tenant_service,
     require_api_key,
     require_operator_token_if_configured,
     require_role,
@@ -24,17 +32,16 @@ from app.models import (
     Document,
     DocumentStatus,
     EvaluationReport,
-    Membership,
     Project,
     Role,
     RunEvent,
-    Tenant,
     TrainingRun,
     User,
 )
 from app.schemas import (
     AuditEventResponse,
     AuthMeResponse,
+    AuthMembershipResponse,
     ChatRequest,
     ChatResponse,
     DashboardResponse,
@@ -60,7 +67,7 @@ from app.schemas import (
     TrainingRunResponse,
     VramEstimateResponse,
 )
-from app.services.audit import log_audit_event
+from app.services.audit import record_audit_event
 from app.services.auth import AuthService, TenantService
 from app.services.dataset import DatasetBuilderService
 from app.services.deployment import DeploymentService
@@ -72,26 +79,132 @@ from app.services.training import TrainingOrchestrator
 
 router = APIRouter(prefix="/api/v1")
 
+REQUIRE_OWNER = require_role(Role.OWNER)
+REQUIRE_OWNER_MANAGER = require_role(Role.OWNER, Role.MANAGER)
+REQUIRE_REVIEWER_CHAIN = require_role(Role.OWNER, Role.MANAGER, Role.REVIEWER)
+
+PAGE_SIZE_DEFAULT = 500
+PAGE_SIZE_MAX = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+_YIELD_PER = 200
+
+# Rows loaded from the ORM already carry the column types these schemas declare, so
+# list endpoints build responses with model_construct instead of re-validating each row.
+_RESPONSE_FIELDS = {
+    schema: tuple(schema.model_fields)
+    for schema in (
+        AuditEventResponse,
+        DatasetResponse,
+        DeploymentResponse,
+        DocumentResponse,
+        EvaluationReportResponse,
+        ProjectResponse,
+        RunEventResponse,
+        TrainingRunResponse,
+    )
+}
+
+
+# One adapter per schema serialises a whole page in a single pass; handlers return the
+# encoded body directly so FastAPI does not validate and encode the list a second time.
+_LIST_ADAPTERS = {schema: TypeAdapter(list[schema]) for schema in _RESPONSE_FIELDS}
+
+
+def _from_row(schema: Any, row: Any) -> Any:
+    return schema.model_construct(**{field: getattr(row, field) for field in _RESPONSE_FIELDS[schema]})
+
+
+def _list_response(schema: Any, items: list[Any], headers: dict[str, str] | None = None) -> Response:
+    return Response(
+        content=_LIST_ADAPTERS[schema].dump_json(items),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def _encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_raw, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_raw), row_id
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+async def _page(
+    db: AsyncSession,
+    stmt: Select,
+    model: Any,
+    schema: Any,
+    limit: int,
+    cursor: str | None,
+    descending: bool = False,
+) -> Response:
+    # Keyset pagination on (created_at, id); the next cursor is returned in a header
+    # so list endpoints keep their plain JSON array bodies.
+    if cursor:
+        created_at, row_id = _decode_cursor(cursor)
+        if descending:
+            stmt = stmt.where(
+                or_(model.created_at < created_at, and_(model.created_at == created_at, model.id < row_id))
+            )
+        else:
+            stmt = stmt.where(
+                or_(model.created_at > created_at, and_(model.created_at == created_at, model.id > row_id))
+            )
+    if descending:
+        stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        stmt = stmt.order_by(model.created_at.asc(), model.id.asc())
+
+    rows = await db.stream_scalars(stmt.limit(limit + 1).execution_options(yield_per=_YIELD_PER))
+    items: list[Any] = []
+    headers: dict[str, str] = {}
+    last = None
+    try:
+        async for row in rows:
+            if len(items) == limit:
+                headers[NEXT_CURSOR_HEADER] = _encode_cursor(last.created_at, last.id)
+                break
+            items.append(_from_row(schema, row))
+            last = row
+    finally:
+        await rows.close()
+    return _list_response(schema, items, headers)
+
+
+HEALTH_PROBE_TTL_SECONDS = 5.0
+_last_health_probe = 0.0
+
 
 @router.get("/healthz", response_model=HealthResponse, tags=["ops"])
-def healthz(db: Session = Depends(get_db)) -> HealthResponse:
-    db.execute(text("SELECT 1"))
+async def healthz(db: AsyncSession = Depends(get_async_db)) -> HealthResponse:
+    # Liveness probes fire constantly; only touch the pool once per TTL window.
+    global _last_health_probe
+    now = time.monotonic()
+    if now - _last_health_probe >= HEALTH_PROBE_TTL_SECONDS:
+        await db.execute(text("SELECT 1"))
+        _last_health_probe = now
     return HealthResponse(status="ok", version=get_settings().app_version)
 
 
 @router.get("/metrics", tags=["ops"], dependencies=[Depends(require_api_key)])
-def metrics() -> Any:
+async def metrics() -> Any:
     return render_metrics()
 
 
 @router.get("/models", tags=["ops"])
-def supported_models() -> dict[str, Any]:
-    return {"models": get_settings().supported_models}
+async def supported_models() -> dict[str, Any]:
+    return {"models": {name: dict(meta) for name, meta in get_settings().supported_models.items()}}
 
 
 @router.post("/auth/register", response_model=TokenResponse, tags=["auth"])
-def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> TokenResponse:
-    service = AuthService(db)
+def register(payload: RegisterRequest, service: AuthService = Depends(get_auth_service)) -> TokenResponse:
     try:
         service.register_user(payload.email, payload.password)
     except ValueError as exc:
@@ -101,8 +214,7 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)) -> TokenRe
 
 
 @router.post("/auth/login", response_model=TokenResponse, tags=["auth"])
-def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
-    service = AuthService(db)
+def login(payload: LoginRequest, service: AuthService = Depends(get_auth_service)) -> TokenResponse:
     try:
         token = service.authenticate(payload.email, payload.password)
     except ValueError as exc:
@@ -112,25 +224,20 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)) -> TokenResponse
 
 @router.get("/auth/me", response_model=AuthMeResponse, tags=["auth"])
 def auth_me(
-    db: Session = Depends(get_db),
     user: User = Depends(current_user),
+    tenant_service: TenantService = Depends(get_tenant_service),
 ) -> AuthMeResponse:
-    rows = db.execute(
-        select(Membership, Tenant)
-        .join(Tenant, Membership.tenant_id == Tenant.id)
-        .where(Membership.user_id == user.id)
-        .order_by(Tenant.created_at.asc())
-    ).all()
+    # Rows come straight from a Core select of trusted columns, so skip validation when building.
     memberships = [
-        {
-            "tenant_id": membership.tenant_id,
-            "tenant_name": tenant.name,
-            "tenant_namespace": tenant.namespace,
-            "role": membership.role,
-        }
-        for membership, tenant in rows
+        AuthMembershipResponse.model_construct(
+            tenant_id=tenant_id,
+            tenant_name=tenant_name,
+            tenant_namespace=tenant_namespace,
+            role=role,
+        )
+        for tenant_id, tenant_name, tenant_namespace, role in tenant_service.list_memberships(user.id)
     ]
-    return AuthMeResponse(
+    return AuthMeResponse.model_construct(
         user_id=user.id,
         email=user.email,
         is_active=user.is_active,
@@ -141,15 +248,17 @@ def auth_me(
 @router.post("/tenants", response_model=TenantResponse, tags=["tenants"])
 def create_tenant(
     payload: TenantCreateRequest,
+    background: BackgroundTasks,
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
+    tenant_service: TenantService = Depends(get_tenant_service),
 ) -> TenantResponse:
     try:
-        tenant = TenantService(db).create_tenant(user.id, payload.name, payload.namespace)
+        tenant = tenant_service.create_tenant(user.id, payload.name, payload.namespace)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    log_audit_event(
-        db,
+    background.add_task(
+        record_audit_event,
         tenant_id=tenant.id,
         user_id=user.id,
         action="tenant_created",
@@ -162,11 +271,11 @@ def create_tenant(
 
 @router.get("/tenants/memberships", response_model=list[dict[str, Any]], tags=["tenants"])
 def list_memberships(
-    db: Session = Depends(get_db),
     user: User = Depends(current_user),
+    tenant_service: TenantService = Depends(get_tenant_service),
 ) -> list[dict[str, Any]]:
-    memberships = TenantService(db).list_memberships(user.id)
-    return [{"tenant_id": item.tenant_id, "role": item.role.value} for item in memberships]
+    rows = tenant_service.list_memberships(user.id)
+    return [{"tenant_id": tenant_id, "role": role.value} for tenant_id, _name, _namespace, role in rows]
 
 
 @router.get("/tenants/plan", response_model=TenantPlanResponse, tags=["tenants"])
@@ -182,17 +291,17 @@ def get_tenant_plan(
     "/tenants/plan",
     response_model=TenantPlanResponse,
     tags=["tenants"],
-    dependencies=[Depends(require_role(Role.OWNER))],
 )
 def set_tenant_plan(
     payload: TenantPlanUpdateRequest,
-    tenant_id: str = Depends(current_tenant_id),
+    background: BackgroundTasks,
+    tenant_id: str = Depends(REQUIRE_OWNER),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> TenantPlanResponse:
     plan = EntitlementService(db).set_tenant_plan(tenant_id, payload.plan_tier)
-    log_audit_event(
-        db,
+    background.add_task(
+        record_audit_event,
         tenant_id=tenant_id,
         user_id=user.id,
         action="tenant_plan_updated",
@@ -207,11 +316,11 @@ def set_tenant_plan(
     "/projects",
     response_model=ProjectResponse,
     tags=["projects"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER))],
 )
 def create_project(
     payload: ProjectCreateRequest,
-    tenant_id: str = Depends(current_tenant_id),
+    background: BackgroundTasks,
+    tenant_id: str = Depends(REQUIRE_OWNER_MANAGER),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> ProjectResponse:
@@ -223,8 +332,8 @@ def create_project(
         style_rules=payload.style_rules,
         refusal_rules=payload.refusal_rules,
     )
-    log_audit_event(
-        db,
+    background.add_task(
+        record_audit_event,
         tenant_id=tenant_id,
         user_id=user.id,
         project_id=project.id,
@@ -237,12 +346,12 @@ def create_project(
 
 
 @router.get("/projects", response_model=list[ProjectResponse], tags=["projects"])
-def list_projects(
+async def list_projects(
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[ProjectResponse]:
-    projects = ProjectService(db).list_projects(tenant_id)
-    return [ProjectResponse.model_validate(item) for item in projects]
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    projects = (await db.scalars(select(Project).where(Project.tenant_id == tenant_id))).all()
+    return _list_response(ProjectResponse, [_from_row(ProjectResponse, item) for item in projects])
 
 
 @router.get("/projects/{project_id}/dashboard", response_model=DashboardResponse, tags=["projects"])
@@ -262,13 +371,13 @@ def project_dashboard(
     "/projects/{project_id}/documents/upload",
     response_model=DocumentUploadResponse,
     tags=["documents"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER, Role.REVIEWER))],
 )
 def upload_document(
     project_id: str,
+    background: BackgroundTasks,
     file: UploadFile = File(...),
     metadata: str = Form(default="{}"),
-    tenant_id: str = Depends(current_tenant_id),
+    tenant_id: str = Depends(REQUIRE_REVIEWER_CHAIN),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> DocumentUploadResponse:
@@ -282,22 +391,23 @@ def upload_document(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
     try:
-        meta = json.loads(metadata)
-    except json.JSONDecodeError as exc:
+        meta = orjson.loads(metadata)
+    except orjson.JSONDecodeError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="metadata must be valid JSON") from exc
 
     try:
-        document = IngestionService(db).ingest_upload(
+        document = IngestionService(db).ingest_upload_stream(
             tenant_id=tenant_id,
             project_id=project_id,
-            file=file,
+            stream=file.file,
+            filename=file.filename,
             metadata=meta,
         )
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
-    log_audit_event(
-        db,
+    background.add_task(
+        record_audit_event,
         tenant_id=tenant_id,
         user_id=user.id,
         project_id=project_id,
@@ -317,64 +427,67 @@ def upload_document(
 
 
 @router.get("/projects/{project_id}/documents", response_model=list[DocumentResponse], tags=["documents"])
-def list_documents(
+async def list_documents(
     project_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[DocumentResponse]:
-    docs = list(
-        db.scalars(
-            select(Document).where(
-                Document.tenant_id == tenant_id,
-                Document.project_id == project_id,
-            )
-        ).all()
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    stmt = select(Document).where(
+        Document.tenant_id == tenant_id,
+        Document.project_id == project_id,
     )
-    return [DocumentResponse.model_validate(doc) for doc in docs]
+    return await _page(db, stmt, Document, DocumentResponse, limit, cursor)
 
 
 @router.post(
     "/documents/{document_id}/status",
     response_model=DocumentResponse,
     tags=["documents"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER, Role.REVIEWER))],
 )
 def update_document_status(
     document_id: str,
     status_value: DocumentStatus,
-    tenant_id: str = Depends(current_tenant_id),
+    background: BackgroundTasks,
+    tenant_id: str = Depends(REQUIRE_REVIEWER_CHAIN),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> DocumentResponse:
-    document = db.get(Document, document_id)
-    if not document or document.tenant_id != tenant_id:
+    document = db.execute(
+        update(Document)
+        .where(Document.id == document_id, Document.tenant_id == tenant_id)
+        .values(status=status_value)
+        .returning(Document)
+    ).scalar_one_or_none()
+    if document is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
-    document.status = status_value
+    # Build the response before commit expires the returned row.
+    response = DocumentResponse.model_validate(document)
     db.commit()
-    db.refresh(document)
-    log_audit_event(
-        db,
+    background.add_task(
+        record_audit_event,
         tenant_id=tenant_id,
         user_id=user.id,
-        project_id=document.project_id,
+        project_id=response.project_id,
         action="document_status_updated",
         entity_type="document",
-        entity_id=document.id,
+        entity_id=response.id,
         details={"status": status_value.value},
     )
-    return DocumentResponse.model_validate(document)
+    return response
 
 
 @router.post(
     "/projects/{project_id}/datasets",
     response_model=DatasetResponse,
     tags=["datasets"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER, Role.REVIEWER))],
 )
 def create_dataset(
     project_id: str,
     payload: DatasetCreateRequest,
-    tenant_id: str = Depends(current_tenant_id),
+    background: BackgroundTasks,
+    tenant_id: str = Depends(REQUIRE_REVIEWER_CHAIN),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> DatasetResponse:
@@ -392,8 +505,8 @@ def create_dataset(
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
-    log_audit_event(
-        db,
+    background.add_task(
+        record_audit_event,
         tenant_id=tenant_id,
         user_id=user.id,
         project_id=project_id,
@@ -406,32 +519,29 @@ def create_dataset(
 
 
 @router.get("/projects/{project_id}/datasets", response_model=list[DatasetResponse], tags=["datasets"])
-def list_datasets(
+async def list_datasets(
     project_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[DatasetResponse]:
-    datasets = list(
-        db.scalars(
-            select(DatasetVersion).where(
-                DatasetVersion.tenant_id == tenant_id,
-                DatasetVersion.project_id == project_id,
-            )
-        ).all()
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    stmt = select(DatasetVersion).where(
+        DatasetVersion.tenant_id == tenant_id,
+        DatasetVersion.project_id == project_id,
     )
-    return [DatasetResponse.model_validate(item) for item in datasets]
+    return await _page(db, stmt, DatasetVersion, DatasetResponse, limit, cursor)
 
 
 @router.post(
     "/projects/{project_id}/runs/estimate",
     response_model=VramEstimateResponse,
     tags=["training"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER))],
 )
 def estimate_run(
     project_id: str,
     payload: TrainingRunCreateRequest,
-    tenant_id: str = Depends(current_tenant_id),
+    tenant_id: str = Depends(REQUIRE_OWNER_MANAGER),
     db: Session = Depends(get_db),
 ) -> VramEstimateResponse:
     project = db.get(Project, project_id)
@@ -449,12 +559,11 @@ def estimate_run(
     "/projects/{project_id}/runs",
     response_model=TrainingRunResponse,
     tags=["training"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER))],
 )
 def create_run(
     project_id: str,
     payload: TrainingRunCreateRequest,
-    tenant_id: str = Depends(current_tenant_id),
+    tenant_id: str = Depends(REQUIRE_OWNER_MANAGER),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> TrainingRunResponse:
@@ -479,47 +588,41 @@ def create_run(
 
 
 @router.get("/projects/{project_id}/runs", response_model=list[TrainingRunResponse], tags=["training"])
-def list_runs(
+async def list_runs(
     project_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[TrainingRunResponse]:
-    runs = list(
-        db.scalars(
-            select(TrainingRun).where(
-                TrainingRun.tenant_id == tenant_id,
-                TrainingRun.project_id == project_id,
-            )
-        ).all()
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    stmt = select(TrainingRun).where(
+        TrainingRun.tenant_id == tenant_id,
+        TrainingRun.project_id == project_id,
     )
-    return [TrainingRunResponse.model_validate(item) for item in runs]
+    return await _page(db, stmt, TrainingRun, TrainingRunResponse, limit, cursor)
 
 
 @router.get("/runs/{run_id}/events", response_model=list[RunEventResponse], tags=["training"])
-def run_events(
+async def run_events(
     run_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[RunEventResponse]:
-    run = db.get(TrainingRun, run_id)
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    run = await db.get(TrainingRun, run_id)
     if not run or run.tenant_id != tenant_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
 
-    events = list(
-        db.scalars(
-            select(RunEvent)
-            .where(RunEvent.run_id == run_id, RunEvent.tenant_id == tenant_id)
-            .order_by(RunEvent.created_at.asc())
-        ).all()
-    )
-    return [RunEventResponse.model_validate(event) for event in events]
+    stmt = select(RunEvent).where(RunEvent.run_id == run_id, RunEvent.tenant_id == tenant_id)
+    return await _page(db, stmt, RunEvent, RunEventResponse, limit, cursor)
 
 
 @router.post(
     "/runs/process-next",
     response_model=TrainingRunResponse | None,
     tags=["training"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER)), Depends(require_operator_token_if_configured)],
+    dependencies=[Depends(REQUIRE_OWNER_MANAGER), Depends(require_operator_token_if_configured)],
 )
 def process_next_run(
     db: Session = Depends(get_db),
@@ -532,11 +635,10 @@ def process_next_run(
     "/runs/{run_id}/cancel",
     response_model=TrainingRunResponse,
     tags=["training"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER))],
 )
 def cancel_run(
     run_id: str,
-    tenant_id: str = Depends(current_tenant_id),
+    tenant_id: str = Depends(REQUIRE_OWNER_MANAGER),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> TrainingRunResponse:
@@ -551,11 +653,10 @@ def cancel_run(
     "/runs/{run_id}/retry",
     response_model=TrainingRunResponse,
     tags=["training"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER))],
 )
 def retry_run(
     run_id: str,
-    tenant_id: str = Depends(current_tenant_id),
+    tenant_id: str = Depends(REQUIRE_OWNER_MANAGER),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> TrainingRunResponse:
@@ -574,32 +675,29 @@ def retry_run(
     response_model=list[EvaluationReportResponse],
     tags=["evaluation"],
 )
-def list_evaluations(
+async def list_evaluations(
     project_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[EvaluationReportResponse]:
-    reports = list(
-        db.scalars(
-            select(EvaluationReport).where(
-                EvaluationReport.tenant_id == tenant_id,
-                EvaluationReport.project_id == project_id,
-            )
-        ).all()
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    stmt = select(EvaluationReport).where(
+        EvaluationReport.tenant_id == tenant_id,
+        EvaluationReport.project_id == project_id,
     )
-    return [EvaluationReportResponse.model_validate(item) for item in reports]
+    return await _page(db, stmt, EvaluationReport, EvaluationReportResponse, limit, cursor)
 
 
 @router.post(
     "/projects/{project_id}/deployments",
     response_model=DeploymentResponse,
     tags=["deployments"],
-    dependencies=[Depends(require_role(Role.OWNER, Role.MANAGER))],
 )
 def create_deployment(
     project_id: str,
     payload: DeploymentCreateRequest,
-    tenant_id: str = Depends(current_tenant_id),
+    tenant_id: str = Depends(REQUIRE_OWNER_MANAGER),
     db: Session = Depends(get_db),
     user: User = Depends(current_user),
 ) -> DeploymentResponse:
@@ -622,20 +720,18 @@ def create_deployment(
     response_model=list[DeploymentResponse],
     tags=["deployments"],
 )
-def list_deployments(
+async def list_deployments(
     project_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[DeploymentResponse]:
-    deployments = list(
-        db.scalars(
-            select(DeploymentPackage).where(
-                DeploymentPackage.tenant_id == tenant_id,
-                DeploymentPackage.project_id == project_id,
-            )
-        ).all()
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    stmt = select(DeploymentPackage).where(
+        DeploymentPackage.tenant_id == tenant_id,
+        DeploymentPackage.project_id == project_id,
     )
-    return [DeploymentResponse.model_validate(item) for item in deployments]
+    return await _page(db, stmt, DeploymentPackage, DeploymentResponse, limit, cursor)
 
 
 @router.post("/inference/chat", response_model=ChatResponse, tags=["inference"])
@@ -660,20 +756,15 @@ def chat(
     response_model=list[AuditEventResponse],
     tags=["audit"],
 )
-def project_audit(
+async def project_audit(
     project_id: str,
+    limit: int = Query(default=PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: str | None = Query(default=None),
     tenant_id: str = Depends(current_tenant_id),
-    db: Session = Depends(get_db),
-) -> list[AuditEventResponse]:
-    events = list(
-        db.scalars(
-            select(AuditEvent)
-            .where(
-                AuditEvent.tenant_id == tenant_id,
-                AuditEvent.project_id == project_id,
-            )
-            .order_by(AuditEvent.created_at.desc())
-            .limit(500)
-        ).all()
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    stmt = select(AuditEvent).where(
+        AuditEvent.tenant_id == tenant_id,
+        AuditEvent.project_id == project_id,
     )
-    return [AuditEventResponse.model_validate(event) for event in events]
+    return await _page(db, stmt, AuditEvent, AuditEventResponse, limit, cursor, descending=True)
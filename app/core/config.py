@@ -1,13 +1,43 @@
 ﻿from __future__ import annotations
 
-from functools import lru_cache
+from functools import cached_property
 from pathlib import Path
-from typing import Any
-from urllib.parse import urlparse
+from types import MappingProxyType
+from typing import Any, Mapping
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Read-only registry shared by every Settings instance instead of a per-instance field.
+SUPPORTED_MODELS: Mapping[str, Mapping[str, Any]] = MappingProxyType(
+    {
+        "mistralai/Mistral-7B-Instruct-v0.3": MappingProxyType(
+            {
+                "license": "Apache-2.0",
+                "vram_tier": "8GB-friendly with QLoRA",
+                "intended_use": "instruction",
+                "approved": True,
+            }
+        ),
+        "meta-llama/Llama-3.1-8B-Instruct": MappingProxyType(
+            {
+                "license": "Llama 3.1 Community License",
+                "vram_tier": "8GB with strict QLoRA settings",
+                "intended_use": "chat",
+                "approved": True,
+            }
+        ),
+        "Qwen/Qwen2.5-7B-Instruct": MappingProxyType(
+            {
+                "license": "Apache-2.0",
+                "vram_tier": "8GB-friendly with QLoRA",
+                "intended_use": "chat",
+                "approved": True,
+            }
+        ),
+    }
+)
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -25,6 +55,9 @@ class Settings(BaseSettings):
     port: int = Field(default=8000, alias="PORT")
 
     database_url: str = Field(default="sqlite:///data/lora_studio.db", alias="DATABASE_URL")
+    db_pool_size: int = Field(default=25, alias="DB_POOL_SIZE")
+    db_pool_overflow: int = Field(default=25, alias="DB_POOL_OVERFLOW")
+    db_pool_recycle_seconds: int = Field(default=1800, alias="DB_POOL_RECYCLE_SECONDS")
     artifacts_path: Path = Field(default=Path("data/artifacts"), alias="ARTIFACTS_PATH")
 
     session_secret: str = Field(default="change-this-secret", alias="SESSION_SECRET")
@@ -41,6 +74,9 @@ class Settings(BaseSettings):
     near_duplicate_threshold: float = Field(default=0.9, alias="NEAR_DUPLICATE_THRESHOLD")
     require_grounding: bool = Field(default=True, alias="REQUIRE_GROUNDING")
     max_upload_mb: int = Field(default=50, alias="MAX_UPLOAD_MB")
+    document_cache_size: int = Field(default=512, alias="DOCUMENT_CACHE_SIZE")
+    # Process pool size for dataset builds: 1 keeps them in-process, 0 uses one worker per CPU.
+    dataset_workers: int = Field(default=1, alias="DATASET_WORKERS")
 
     worker_poll_seconds: float = Field(default=2.0, alias="WORKER_POLL_SECONDS")
     enable_background_worker: bool = Field(default=True, alias="ENABLE_BACKGROUND_WORKER")
@@ -49,31 +85,12 @@ class Settings(BaseSettings):
     inference_backend: str = Field(default="mock", alias="INFERENCE_BACKEND")
     ollama_base_url: str = Field(default="http://localhost:11434", alias="OLLAMA_BASE_URL")
     ollama_chat_model: str = Field(default="llama3.1:8b", alias="OLLAMA_CHAT_MODEL")
+    ollama_cache_size: int = Field(default=1024, alias="OLLAMA_CACHE_SIZE")
+    ollama_cache_ttl_seconds: float = Field(default=300.0, alias="OLLAMA_CACHE_TTL_SECONDS")
 
     trainer_backend: str = Field(default="mock", alias="TRAINER_BACKEND")
     trainer_command_template: str | None = Field(default=None, alias="TRAINER_COMMAND_TEMPLATE")
 
-    supported_models: dict[str, dict[str, Any]] = {
-        "mistralai/Mistral-7B-Instruct-v0.3": {
-            "license": "Apache-2.0",
-            "vram_tier": "8GB-friendly with QLoRA",
-            "intended_use": "instruction",
-            "approved": True,
-        },
-        "meta-llama/Llama-3.1-8B-Instruct": {
-            "license": "Llama 3.1 Community License",
-            "vram_tier": "8GB with strict QLoRA settings",
-            "intended_use": "chat",
-            "approved": True,
-        },
-        "Qwen/Qwen2.5-7B-Instruct": {
-            "license": "Apache-2.0",
-            "vram_tier": "8GB-friendly with QLoRA",
-            "intended_use": "chat",
-            "approved": True,
-        },
-    }
-
     @field_validator("access_token_expire_minutes", "max_upload_mb", "password_pbkdf2_iterations")
     @classmethod
     def validate_positive_int(cls, value: int) -> int:
@@ -111,6 +128,18 @@ class Settings(BaseSettings):
             raise ValueError("trainer_backend must be one of: mock, command")
         return normalized
 
+    @property
+    def supported_models(self) -> Mapping[str, Mapping[str, Any]]:
+        return SUPPORTED_MODELS
+
+    @cached_property
+    def api_key_bytes(self) -> bytes | None:
+        return self.api_key.encode("utf-8") if self.api_key else None
+
+    @cached_property
+    def operator_token_bytes(self) -> bytes | None:
+        return self.operator_token.encode("utf-8") if self.operator_token else None
+
     def ensure_directories(self) -> None:
         self.artifacts_path.mkdir(parents=True, exist_ok=True)
         self._ensure_sqlite_parent(self.database_url)
@@ -119,15 +148,26 @@ class Settings(BaseSettings):
     def _ensure_sqlite_parent(database_url: str) -> None:
         if not database_url.startswith("sqlite"):
             return
-        parsed = urlparse(database_url)
-        db_path = parsed.path.lstrip("/")
+        # sqlite:///relative.db and sqlite:////absolute.db; the path is whatever follows "///".
+        db_path = database_url.partition("///")[2].partition("?")[0]
         if not db_path:
             return
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
 
-@lru_cache(maxsize=1)
+_settings: Settings | None = None
+
+
 def get_settings() -> Settings:
-    settings = Settings()
-    settings.ensure_directories()
+    global _settings
+    settings = _settings
+    if settings is None:
+        settings = Settings()
+        settings.ensure_directories()
+        _settings = settings
     return settings
+
+
+def reset_settings_cache() -> None:
+    global _settings
+    _settings = None
@@ -1,9 +1,9 @@
 ﻿from __future__ import annotations
 
-from functools import lru_cache
-
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 
 from app.core.config import get_settings
 
@@ -12,33 +12,125 @@ class Base(DeclarativeBase):
     pass
 
 
-@lru_cache(maxsize=1)
+# Process-wide singletons, created on first use and dropped by reset_db_cache().
+_engine = None
+_session_maker = None
+_async_engine = None
+_async_session_maker = None
+
+
+# WAL lets readers proceed while a writer holds the lock; NORMAL sync is safe under WAL.
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
 def get_engine():
+    global _engine
+    if _engine is not None:
+        return _engine
     settings = get_settings()
-    connect_args = {"check_same_thread": False} if settings.database_url.startswith("sqlite") else {}
-    return create_engine(settings.database_url, connect_args=connect_args)
+    is_sqlite = settings.database_url.startswith("sqlite")
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    if is_sqlite and ":memory:" in settings.database_url:
+        # One shared connection, otherwise every checkout would see a fresh empty database.
+        pool_args = {"poolclass": StaticPool}
+    else:
+        # Keep WAL-mode connections open across requests instead of reopening the .db/-wal/-shm
+        # files; a local SQLite file cannot drop connections, so pre-ping is skipped there.
+        pool_args = {
+            "poolclass": QueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_pool_overflow,
+            "pool_pre_ping": not is_sqlite,
+            "pool_recycle": settings.db_pool_recycle_seconds,
+        }
+    engine = create_engine(settings.database_url, connect_args=connect_args, **pool_args)
+    if is_sqlite:
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    _engine = engine
+    return engine
 
 
-@lru_cache(maxsize=1)
 def get_session_maker():
-    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+    global _session_maker
+    if _session_maker is None:
+        # Every column default is computed in Python, so committed instances already hold their
+        # values; expiring them would turn each post-commit attribute access into a SELECT.
+        _session_maker = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=get_engine())
+    return _session_maker
 
 
-def init_db() -> None:
-    from app.models import domain  # noqa: F401
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
 
-    Base.metadata.create_all(bind=get_engine())
 
+def async_database_url(url: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
 
-def get_db_session():
-    session_maker = get_session_maker()
-    db = session_maker()
-    try:
-        yield db
-    finally:
-        db.close()
+
+def get_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        return _async_engine
+    settings = get_settings()
+    url = async_database_url(settings.database_url)
+    pool_args = {}
+    if not (url.startswith("sqlite") and ":memory:" in url):
+        pool_args = {
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_pool_overflow,
+            "pool_pre_ping": not url.startswith("sqlite"),
+            "pool_recycle": settings.db_pool_recycle_seconds,
+        }
+    engine = create_async_engine(url, **pool_args)
+    if url.startswith("sqlite"):
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    _async_engine = engine
+    return engine
+
+
+def get_async_session_maker():
+    global _async_session_maker
+    if _async_session_maker is None:
+        _async_session_maker = async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_maker
+
+
+def init_db() -> None:
+    from app.models import domain  # noqa: F401
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so indexes added to existing models
+    # are created here; there is no migration tool in this project.
+    with engine.begin() as connection:
+        for table in Base.metadata.tables.values():
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
 
 
 def reset_db_cache() -> None:
-    get_session_maker.cache_clear()
-    get_engine.cache_clear()
+    global _engine, _session_maker, _async_engine, _async_session_maker
+    if _engine is not None:
+        # Close pooled connections instead of leaving them to the garbage collector.
+        _engine.dispose()
+    _engine = _session_maker = _async_engine = _async_session_maker = None
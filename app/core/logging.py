@@ -1,51 +1,125 @@
 ﻿from __future__ import annotations
 
-import json
 import logging
-from datetime import datetime, timezone
+import time
 from typing import Any
 
+import orjson
 
-class JsonFormatter(logging.Formatter):
-    _skip_keys = {
-        "args",
-        "created",
-        "exc_info",
-        "exc_text",
-        "filename",
-        "funcName",
-        "levelname",
-        "levelno",
-        "lineno",
-        "module",
-        "msecs",
-        "message",
-        "msg",
-        "name",
-        "pathname",
-        "process",
-        "processName",
-        "relativeCreated",
-        "stack_info",
-        "thread",
-        "threadName",
-    }
 
-    def format(self, record: logging.LogRecord) -> str:
-        payload: dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "level": record.levelname,
-            "logger": record.name,
-            "message": record.getMessage(),
+class JsonFormatter(logging.Formatter):
+    _skip_keys = frozenset(
+        {
+            "args",
+            "created",
+            "exc_info",
+            "exc_text",
+            "filename",
+            "funcName",
+            "levelname",
+            "levelno",
+            "lineno",
+            "module",
+            "msecs",
+            "message",
+            "msg",
+            "name",
+            "pathname",
+            "process",
+            "processName",
+            "relativeCreated",
+            "stack_info",
+            "taskName",
+            "thread",
+            "threadName",
+            # Fixed keys written by the skeleton below.
+            "timestamp",
+            "level",
+            "logger",
         }
-        for key, value in record.__dict__.items():
-            if key in self._skip_keys or key.startswith("_"):
-                continue
-            payload.setdefault(key, value)
+    )
+
+    # The fixed keys are spliced around per-record values instead of being re-serialised.
+    _timestamp_prefix = b'{"timestamp":'
+    _level_prefix = b',"level":'
+    _logger_prefix = b',"logger":'
+    _message_prefix = b',"message":'
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._encoded_names: dict[str, bytes] = {}
+        self._second_prefix: tuple[int, bytes] = (-1, b"")
+
+    def _encoded_name(self, value: str) -> bytes:
+        encoded = self._encoded_names.get(value)
+        if encoded is None:
+            encoded = self._encoded_names[value] = orjson.dumps(value)
+        return encoded
+
+    def _timestamp(self) -> bytes:
+        # ISO-8601 UTC; the date/time part is formatted once per second and reused.
+        seconds, nanos = divmod(time.time_ns(), 1_000_000_000)
+        cached = self._second_prefix
+        if cached[0] != seconds:
+            tm = time.gmtime(seconds)
+            prefix = (
+                f'"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d}'
+                f'T{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}.'
+            ).encode("ascii")
+            cached = self._second_prefix = (seconds, prefix)
+        return cached[1] + b'%06d+00:00"' % (nanos // 1000)
 
+    def format_bytes(self, record: logging.LogRecord) -> bytes:
+        attributes = record.__dict__
+        extras: dict[str, Any] = {
+            key: attributes[key] for key in sorted(attributes.keys() - self._skip_keys) if not key.startswith("_")
+        }
         if record.exc_info:
-            payload["exception"] = self.formatException(record.exc_info)
-        return json.dumps(payload, default=str)
+            extras["exception"] = self.formatException(record.exc_info)
+
+        parts = [
+            self._timestamp_prefix,
+            self._timestamp(),
+            self._level_prefix,
+            self._encoded_name(record.levelname),
+            self._logger_prefix,
+            self._encoded_name(record.name),
+            self._message_prefix,
+            orjson.dumps(record.getMessage()),
+        ]
+        if extras:
+            parts.append(b",")
+            parts.append(orjson.dumps(extras, default=str, option=orjson.OPT_NON_STR_KEYS)[1:])
+        else:
+            parts.append(b"}")
+        return b"".join(parts)
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self.format_bytes(record).decode("utf-8")
+
+
+class JsonStreamHandler(logging.StreamHandler):
+    # Writes the formatter's bytes straight to the underlying binary buffer, skipping the
+    # decode in format() and the text layer's re-encode.
+    def emit(self, record: logging.LogRecord) -> None:
+        formatter = self.formatter
+        buffer = getattr(self.stream, "buffer", None)
+        if buffer is None or not isinstance(formatter, JsonFormatter):
+            super().emit(record)
+            return
+        try:
+            line = formatter.format_bytes(record) + b"\n"
+            self.acquire()
+            try:
+                self.stream.flush()
+                buffer.write(line)
+                buffer.flush()
+            finally:
+                self.release()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
 
 
 def configure_logging(level: str = "INFO") -> None:
@@ -53,6 +127,6 @@ def configure_logging(level: str = "INFO") -> None:
     root.handlers.clear()
     root.setLevel(level.upper())
 
-    handler = logging.StreamHandler()
+    handler = JsonStreamHandler()
     handler.setFormatter(JsonFormatter())
     root.addHandler(handler)
@@ -1,12 +1,16 @@
 ﻿from __future__ import annotations
 
-from time import perf_counter
+import sys
+from functools import lru_cache
+from time import monotonic
+from typing import Any
 
 from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
 from starlette.responses import Response
 
+# Scrapes of the metrics endpoint itself are not recorded as request metrics.
+SCRAPE_PATH = "/api/v1/metrics"
+
 REQUEST_COUNT = Counter(
     "lora_studio_requests_total",
     "Total HTTP requests",
@@ -38,21 +42,45 @@ INFERENCE_REQUESTS = Counter(
 )
 
 
-class MetricsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):  # type: ignore[override]
-        started = perf_counter()
-        endpoint = request.url.path
-        status = "500"
-        try:
-            response = await call_next(request)
-            status = str(response.status_code)
-            return response
-        finally:
-            REQUEST_COUNT.labels(endpoint=endpoint, method=request.method, status=status).inc()
-            REQUEST_LATENCY.labels(endpoint=endpoint, method=request.method).observe(
-                perf_counter() - started
-            )
+_STATUS_LABELS = {
+    code: sys.intern(str(code))
+    for code in (200, 201, 204, 301, 302, 304, 400, 401, 403, 404, 409, 413, 422, 500, 502, 503)
+}
+_METHOD_LABELS = {
+    method: sys.intern(method) for method in ("GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD")
+}
+
+
+@lru_cache(maxsize=4096)
+def _request_count(endpoint: str, method: str, status: str):
+    return REQUEST_COUNT.labels(endpoint=endpoint, method=method, status=status)
+
+
+@lru_cache(maxsize=4096)
+def _request_latency(endpoint: str, method: str):
+    return REQUEST_LATENCY.labels(endpoint=endpoint, method=method)
+
+
+def _endpoint_label(scope: Any) -> str:
+    # Label by route template (e.g. /api/v1/runs/{run_id}/events) so cardinality stays bounded;
+    # unmatched paths (404s) share one label instead of each becoming a series.
+    path = getattr(scope.get("route"), "path", None)
+    return path if path is not None else "<unmatched>"
+
+
+def observe_request(scope: Any, status_code: int, elapsed_ns: int) -> None:
+    endpoint = _endpoint_label(scope)
+    method = _METHOD_LABELS.get(scope["method"], scope["method"])
+    status = _STATUS_LABELS.get(status_code) or str(status_code)
+    _request_count(endpoint, method, status).inc()
+    _request_latency(endpoint, method).observe(elapsed_ns / 1e9)
+
+
+@lru_cache(maxsize=1)
+def _render_for_second(second: int) -> bytes:
+    return generate_latest()
 
 
 def render_metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # Coalesce scrapes landing in the same second onto one pre-encoded payload.
+    return Response(_render_for_second(int(monotonic())), media_type=CONTENT_TYPE_LATEST)
@@ -7,11 +7,13 @@ import hmac
 import re
 import secrets
 from datetime import UTC, datetime, timedelta
+from functools import lru_cache
 from typing import Any
 
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
 
 try:
     import bcrypt
@@ -19,6 +21,7 @@ except Exception:  # pragma: no cover - optional dependency in some deploys
     bcrypt = None
 
 ALGORITHM = "HS256"
+_ALGORITHMS = (ALGORITHM,)
 _PASSWORD_POLICY = re.compile(r"^(?=.*[a-zA-Z])(?=.*\d).{8,128}$")
 _PBKDF2_PREFIX = "pbkdf2_sha256"
 
@@ -28,15 +31,25 @@ def normalize_email(email: str) -> str:
 
 
 def validate_password(password: str) -> tuple[bool, str | None]:
-    if not _PASSWORD_POLICY.match(password):
+    # Lengths the policy can never accept are rejected before the lookaheads scan the whole input
+    # (129 allows the trailing newline that "$" tolerates).
+    if not 8 <= len(password) <= 129 or not _PASSWORD_POLICY.match(password):
         return False, "Password must be 8+ chars with at least one letter and one number."
     return True, None
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def verify_and_maybe_rehash(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    # Single parse of the stored hash: returns (valid, replacement hash when the stored one is outdated).
     if hashed_password.startswith(f"{_PBKDF2_PREFIX}$"):
-        return _verify_pbkdf2_password(plain_password, hashed_password)
-    return _verify_legacy_bcrypt_password(plain_password, hashed_password)
+        parsed = _parse_pbkdf2_hash(hashed_password)
+        if not parsed or not _check_pbkdf2(plain_password, parsed):
+            return False, None
+        if parsed[0] >= get_settings().password_pbkdf2_iterations:
+            return True, None
+        return True, get_password_hash(plain_password)
+    if not _verify_legacy_bcrypt_password(plain_password, hashed_password):
+        return False, None
+    return True, get_password_hash(plain_password)
 
 
 def get_password_hash(password: str) -> str:
@@ -52,34 +65,36 @@ def get_password_hash(password: str) -> str:
     )
 
 
-def password_needs_rehash(hashed_password: str) -> bool:
-    if not hashed_password.startswith(f"{_PBKDF2_PREFIX}$"):
-        return True
-    parsed = _parse_pbkdf2_hash(hashed_password)
-    if not parsed:
-        return True
-    iterations, _, _ = parsed
-    return iterations < get_settings().password_pbkdf2_iterations
-
-
 def create_access_token(subject: str, expires_delta: timedelta | None = None) -> str:
     settings = get_settings()
     expire = datetime.now(tz=UTC) + (
         expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
     )
     payload: dict[str, Any] = {"sub": subject, "exp": expire}
-    return jwt.encode(payload, settings.session_secret, algorithm=ALGORITHM)
+    return jwt.encode(payload, _signing_key(settings), algorithm=ALGORITHM)
 
 
 def decode_access_token(token: str) -> str | None:
-    settings = get_settings()
     try:
-        payload = jwt.decode(token, settings.session_secret, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _signing_key(get_settings()), algorithms=_ALGORITHMS)
         return payload.get("sub")
     except JWTError:
         return None
 
 
+# jose rebuilds the HMAC key from the raw secret on every call (after first trying to parse
+# it as a JWK set); build it once per Settings instance instead.
+_signing_key_cache: tuple[Settings, Key] | None = None
+
+
+def _signing_key(settings: Settings) -> Key:
+    global _signing_key_cache
+    cached = _signing_key_cache
+    if cached is None or cached[0] is not settings:
+        cached = _signing_key_cache = (settings, jwk.construct(settings.session_secret, ALGORITHM))
+    return cached[1]
+
+
 def _b64encode(raw: bytes) -> str:
     return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
@@ -89,6 +104,8 @@ def _b64decode(encoded: str) -> bytes:
     return base64.urlsafe_b64decode(f"{encoded}{padding}")
 
 
+# Stored hashes are immutable strings, so the split/base64 work is done once per hash.
+@lru_cache(maxsize=4096)
 def _parse_pbkdf2_hash(hashed_password: str) -> tuple[int, bytes, bytes] | None:
     try:
         scheme, iter_raw, salt_raw, digest_raw = hashed_password.split("$", 3)
@@ -104,10 +121,7 @@ def _parse_pbkdf2_hash(hashed_password: str) -> tuple[int, bytes, bytes] | None:
     return iterations, salt, digest
 
 
-def _verify_pbkdf2_password(plain_password: str, hashed_password: str) -> bool:
-    parsed = _parse_pbkdf2_hash(hashed_password)
-    if not parsed:
-        return False
+def _check_pbkdf2(plain_password: str, parsed: tuple[int, bytes, bytes]) -> bool:
     iterations, salt, expected_digest = parsed
     candidate = hashlib.pbkdf2_hmac("sha256", plain_password.encode("utf-8"), salt, iterations)
     return hmac.compare_digest(candidate, expected_digest)
@@ -5,15 +5,14 @@ import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api.router import router as api_router
 from app.core.config import get_settings
-from app.core.db import init_db
+from app.core.db import get_async_engine, init_db
 from app.core.logging import configure_logging
-from app.core.metrics import MetricsMiddleware
-from app.core.middleware import RequestContextMiddleware
+from app.core.middleware import DatabaseSessionMiddleware, ObservabilityMiddleware
 from app.services.worker import BackgroundWorker
 from app.web.router import router as web_router
 
@@ -42,6 +41,7 @@ async def lifespan(app: FastAPI):
     yield
 
     worker.stop()
+    await get_async_engine().dispose()
     logger.info("application_stopped")
 
 
@@ -52,11 +52,11 @@ def create_app() -> FastAPI:
         version=settings.app_version,
         description="Production-grade LoRA fine-tuning studio for niche expertise.",
         lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
-    app.add_middleware(RequestContextMiddleware)
-    if settings.enable_metrics:
-        app.add_middleware(MetricsMiddleware)
+    app.add_middleware(DatabaseSessionMiddleware)
+    app.add_middleware(ObservabilityMiddleware, metrics_enabled=settings.enable_metrics)
 
     app.mount("/static", StaticFiles(directory="app/web/static"), name="static")
     app.include_router(web_router)
@@ -69,11 +69,11 @@ def create_app() -> FastAPI:
             "unhandled_exception",
             extra={
                 "request_id": request_id,
-                "path": request.url.path,
+                "path": request.scope["path"],
                 "method": request.method,
             },
         )
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "detail": "Internal server error",
@@ -2,9 +2,23 @@
 
 import enum
 import uuid
+from dataclasses import dataclass
 from datetime import UTC, datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, Float, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    TypeDecorator,
+    UniqueConstraint,
+)
 from sqlalchemy.dialects.sqlite import JSON
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -15,6 +29,54 @@ def utcnow() -> datetime:
     return datetime.now(tz=UTC)
 
 
+class UUIDBinary(TypeDecorator):
+    # Stores UUID strings as 16 raw bytes (vs 36 chars) to keep PK/FK indexes small; Python sees str.
+    # Byte order matches the canonical hex form, so ordering (keyset cursors) is unchanged.
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        try:
+            return uuid.UUID(value).bytes
+        except (ValueError, AttributeError, TypeError):
+            # Not a UUID (e.g. a bogus id from a client): encode as-is so it simply matches nothing.
+            return str(value).encode("utf-8")
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        value = bytes(value)
+        if len(value) == 16:
+            return str(uuid.UUID(bytes=value))
+        return value.decode("utf-8", "replace")
+
+
+class EnumName(TypeDecorator):
+    # Plain VARCHAR holding the member name (the same on-disk form as Enum()), without Enum's
+    # CHECK constraint or per-value validation; conversion is one dict lookup each way.
+    impl = String(32)
+    cache_ok = True
+
+    def __init__(self, enum_cls: type[enum.Enum]):
+        super().__init__()
+        self.enum_cls = enum_cls
+        self._by_name = {member.name: member for member in enum_cls}
+        # Accepts members, their values ("owner") or their names ("OWNER") on the way in.
+        self._to_name = {member.value: member.name for member in enum_cls} | {name: name for name in self._by_name}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, self.enum_cls):
+            return value.name
+        return self._to_name[value]
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self._by_name[value]
+
+
 class Role(str, enum.Enum):
     OWNER = "owner"
     MANAGER = "manager"
@@ -29,6 +91,22 @@ class PlanTier(str, enum.Enum):
     ENTERPRISE = "enterprise"
 
 
+@dataclass(frozen=True)
+class PlanLimits:
+    max_documents: int
+    max_training_runs_monthly: int
+    max_storage_mb: int
+
+
+# Limits are fully determined by the tier, so they live here rather than in every tenant_plans row.
+PLAN_LIMITS: dict[PlanTier, PlanLimits] = {
+    PlanTier.STARTER: PlanLimits(max_documents=200, max_training_runs_monthly=10, max_storage_mb=2048),
+    PlanTier.STANDARD: PlanLimits(max_documents=1000, max_training_runs_monthly=50, max_storage_mb=10240),
+    PlanTier.PRO: PlanLimits(max_documents=5000, max_training_runs_monthly=200, max_storage_mb=51200),
+    PlanTier.ENTERPRISE: PlanLimits(max_documents=50000, max_training_runs_monthly=5000, max_storage_mb=512000),
+}
+
+
 class DocumentStatus(str, enum.Enum):
     READY = "ready"
     NEEDS_REVIEW = "needs_review"
@@ -64,58 +142,75 @@ class DeploymentStatus(str, enum.Enum):
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
     hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
-    memberships: Mapped[list[Membership]] = relationship(back_populates="user", cascade="all, delete-orphan")
+    # Membership relationships never lazy-load: an accidental N+1 fails loudly instead of silently querying.
+    memberships: Mapped[list[Membership]] = relationship(back_populates="user", cascade="all, delete-orphan", lazy="raise")
 
 
 class Tenant(Base):
     __tablename__ = "tenants"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     name: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     namespace: Mapped[str] = mapped_column(String(255), unique=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
-    memberships: Mapped[list[Membership]] = relationship(back_populates="tenant", cascade="all, delete-orphan")
+    memberships: Mapped[list[Membership]] = relationship(back_populates="tenant", cascade="all, delete-orphan", lazy="raise")
 
 
 class Membership(Base):
     __tablename__ = "memberships"
-    __table_args__ = (UniqueConstraint("user_id", "tenant_id", name="uq_membership_user_tenant"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "tenant_id", name="uq_membership_user_tenant"),
+        Index("ix_memberships_user_tenant_role", "user_id", "tenant_id", "role"),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
-    role: Mapped[Role] = mapped_column(Enum(Role), nullable=False)
+    role: Mapped[Role] = mapped_column(EnumName(Role), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
-    user: Mapped[User] = relationship(back_populates="memberships")
-    tenant: Mapped[Tenant] = relationship(back_populates="memberships")
+    user: Mapped[User] = relationship(back_populates="memberships", lazy="raise")
+    tenant: Mapped[Tenant] = relationship(back_populates="memberships", lazy="raise")
 
 
 class TenantPlan(Base):
     __tablename__ = "tenant_plans"
     __table_args__ = (UniqueConstraint("tenant_id", name="uq_tenant_plan_tenant"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
-    plan_tier: Mapped[PlanTier] = mapped_column(Enum(PlanTier), default=PlanTier.STARTER, nullable=False)
-    max_documents: Mapped[int] = mapped_column(Integer, default=200, nullable=False)
-    max_training_runs_monthly: Mapped[int] = mapped_column(Integer, default=10, nullable=False)
-    max_storage_mb: Mapped[int] = mapped_column(Integer, default=2048, nullable=False)
+    plan_tier: Mapped[PlanTier] = mapped_column(EnumName(PlanTier), default=PlanTier.STARTER, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, onupdate=utcnow, nullable=False)
 
+    @property
+    def limits(self) -> PlanLimits:
+        return PLAN_LIMITS[self.plan_tier]
+
+    @property
+    def max_documents(self) -> int:
+        return self.limits.max_documents
+
+    @property
+    def max_training_runs_monthly(self) -> int:
+        return self.limits.max_training_runs_monthly
+
+    @property
+    def max_storage_mb(self) -> int:
+        return self.limits.max_storage_mb
+
 
 class Project(Base):
     __tablename__ = "projects"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
@@ -132,8 +227,9 @@ class Project(Base):
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (Index("ix_documents_tenant_project_created", "tenant_id", "project_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -141,22 +237,28 @@ class Document(Base):
     storage_path: Mapped[str] = mapped_column(String(1024), nullable=False)
     normalized_text_path: Mapped[str] = mapped_column(String(1024), nullable=False)
     sha256_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
-    near_duplicate_of: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    size_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    near_duplicate_of: Mapped[str | None] = mapped_column(UUIDBinary, nullable=True)
+    # Signed 64-bit SimHash of the hashed text embedding; NULL for empty documents.
+    simhash: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Normalized 256-dim float32 hashed embedding (1 KB), so near-duplicate checks skip the JSON files.
+    embedding: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True, deferred=True)
     quality_score: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     pii_hits: Mapped[list[dict]] = mapped_column(JSON, default=list, nullable=False)
     metadata_json: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
-    status: Mapped[DocumentStatus] = mapped_column(Enum(DocumentStatus), default=DocumentStatus.READY, nullable=False)
+    status: Mapped[DocumentStatus] = mapped_column(EnumName(DocumentStatus), default=DocumentStatus.READY, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
 
 class DatasetVersion(Base):
     __tablename__ = "dataset_versions"
+    __table_args__ = (Index("ix_dataset_versions_tenant_project_created", "tenant_id", "project_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
-    status: Mapped[DatasetStatus] = mapped_column(Enum(DatasetStatus), default=DatasetStatus.BUILDING, nullable=False)
+    status: Mapped[DatasetStatus] = mapped_column(EnumName(DatasetStatus), default=DatasetStatus.BUILDING, nullable=False)
     source_document_ids: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
     train_path: Mapped[str] = mapped_column(String(1024), nullable=False)
     val_path: Mapped[str] = mapped_column(String(1024), nullable=False)
@@ -170,15 +272,16 @@ class DatasetVersion(Base):
 
 class TrainingRun(Base):
     __tablename__ = "training_runs"
+    __table_args__ = (Index("ix_training_runs_tenant_project_created", "tenant_id", "project_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     dataset_version_id: Mapped[str] = mapped_column(ForeignKey("dataset_versions.id"), nullable=False, index=True)
     requested_by_user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     base_model_id: Mapped[str] = mapped_column(String(255), nullable=False)
     config_json: Mapped[dict] = mapped_column(JSON, nullable=False)
-    state: Mapped[RunState] = mapped_column(Enum(RunState), default=RunState.QUEUED, nullable=False, index=True)
+    state: Mapped[RunState] = mapped_column(EnumName(RunState), default=RunState.QUEUED, nullable=False, index=True)
     state_message: Mapped[str | None] = mapped_column(Text)
     progress: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
     vram_estimate_gb: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
@@ -193,8 +296,9 @@ class TrainingRun(Base):
 
 class EvaluationReport(Base):
     __tablename__ = "evaluation_reports"
+    __table_args__ = (Index("ix_evaluation_reports_tenant_project_created", "tenant_id", "project_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     training_run_id: Mapped[str] = mapped_column(ForeignKey("training_runs.id"), nullable=False, index=True)
@@ -207,13 +311,14 @@ class EvaluationReport(Base):
 
 class DeploymentPackage(Base):
     __tablename__ = "deployment_packages"
+    __table_args__ = (Index("ix_deployment_packages_tenant_project_created", "tenant_id", "project_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
     tenant_id: Mapped[str] = mapped_column(ForeignKey("tenants.id"), nullable=False, index=True)
     project_id: Mapped[str] = mapped_column(ForeignKey("projects.id"), nullable=False, index=True)
     training_run_id: Mapped[str] = mapped_column(ForeignKey("training_runs.id"), nullable=False, index=True)
     version: Mapped[str] = mapped_column(String(64), nullable=False)
-    status: Mapped[DeploymentStatus] = mapped_column(Enum(DeploymentStatus), default=DeploymentStatus.CREATED, nullable=False)
+    status: Mapped[DeploymentStatus] = mapped_column(EnumName(DeploymentStatus), default=DeploymentStatus.CREATED, nullable=False)
     package_path: Mapped[str] = mapped_column(String(1024), nullable=False)
     endpoint_url: Mapped[str | None] = mapped_column(String(1024))
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
@@ -221,24 +326,26 @@ class DeploymentPackage(Base):
 
 class AuditEvent(Base):
     __tablename__ = "audit_events"
+    __table_args__ = (Index("ix_audit_events_tenant_project_created", "tenant_id", "project_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
-    user_id: Mapped[str | None] = mapped_column(String(36), index=True)
-    project_id: Mapped[str | None] = mapped_column(String(36), index=True)
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(UUIDBinary, nullable=False, index=True)
+    user_id: Mapped[str | None] = mapped_column(UUIDBinary, index=True)
+    project_id: Mapped[str | None] = mapped_column(UUIDBinary, index=True)
     action: Mapped[str] = mapped_column(String(255), nullable=False)
     entity_type: Mapped[str] = mapped_column(String(100), nullable=False)
-    entity_id: Mapped[str | None] = mapped_column(String(36))
+    entity_id: Mapped[str | None] = mapped_column(UUIDBinary)
     details_json: Mapped[dict] = mapped_column(JSON, default=dict, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
 
 class RunEvent(Base):
     __tablename__ = "run_events"
+    __table_args__ = (Index("ix_run_events_run_tenant_created", "run_id", "tenant_id", "created_at", "id"),)
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    tenant_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
-    project_id: Mapped[str] = mapped_column(String(36), nullable=False, index=True)
+    id: Mapped[str] = mapped_column(UUIDBinary, primary_key=True, default=lambda: str(uuid.uuid4()))
+    tenant_id: Mapped[str] = mapped_column(UUIDBinary, nullable=False, index=True)
+    project_id: Mapped[str] = mapped_column(UUIDBinary, nullable=False, index=True)
     run_id: Mapped[str] = mapped_column(ForeignKey("training_runs.id"), nullable=False, index=True)
     from_state: Mapped[str | None] = mapped_column(String(32))
     to_state: Mapped[str] = mapped_column(String(32), nullable=False)
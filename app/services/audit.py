@@ -1,7 +1,12 @@
 ﻿from __future__ import annotations
 
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from app.core.db import get_session_maker
 from app.models import AuditEvent
 
 
@@ -15,18 +20,31 @@ def log_audit_event(
     details: dict,
     user_id: str | None = None,
     project_id: str | None = None,
-) -> AuditEvent:
-    event = AuditEvent(
-        tenant_id=tenant_id,
-        user_id=user_id,
-        project_id=project_id,
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        details_json=details,
+) -> str:
+    # Core INSERT with client-side id/timestamp: no unit-of-work flush and no refresh SELECT.
+    # The row joins the caller's transaction; committing it is the caller's job.
+    event_id = str(uuid.uuid4())
+    db.execute(
+        insert(AuditEvent).values(
+            id=event_id,
+            tenant_id=tenant_id,
+            user_id=user_id,
+            project_id=project_id,
+            action=action,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            details_json=details,
+            created_at=datetime.now(tz=UTC),
+        )
     )
-    db.add(event)
-    db.commit()
-    db.refresh(event)
-    return event
+    return event_id
+
 
+def record_audit_event(**kwargs) -> None:
+    # Runs after the response is sent, so it must not reuse the request's session.
+    db = get_session_maker()()
+    try:
+        log_audit_event(db, **kwargs)
+        db.commit()
+    finally:
+        db.close()
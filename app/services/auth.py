@@ -1,19 +1,44 @@
 ﻿from __future__ import annotations
 
+import secrets
+import uuid
 from datetime import timedelta
+from functools import lru_cache
 
-from sqlalchemy import select
+from sqlalchemy import Row, bindparam, select
 from sqlalchemy.orm import Session
 
 from app.core.security import (
     create_access_token,
     get_password_hash,
     normalize_email,
-    password_needs_rehash,
     validate_password,
-    verify_password,
+    verify_and_maybe_rehash,
 )
-from app.models import Membership, PlanTier, Role, Tenant, User
+from app.models import Membership, PlanTier, Role, Tenant, TenantPlan, User
+from app.models.domain import utcnow
+
+
+# Hot-path statements are built once; SQLAlchemy's compiled cache then skips the clause-tree walk per call.
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_USER_ID_BY_EMAIL = select(User.id).where(User.email == bindparam("email"))
+_TENANT_ID_BY_NAMESPACE = select(Tenant.id).where(Tenant.namespace == bindparam("namespace"))
+_MEMBERSHIPS_FOR_USER = (
+    select(Membership.tenant_id, Tenant.name, Tenant.namespace, Membership.role)
+    .join(Tenant, Membership.tenant_id == Tenant.id)
+    .where(Membership.user_id == bindparam("user_id"))
+    .order_by(Tenant.created_at.asc())
+)
+_ROLE_FOR_USER = select(Membership.role).where(
+    Membership.user_id == bindparam("user_id"),
+    Membership.tenant_id == bindparam("tenant_id"),
+)
+
+
+# Built on first use rather than at import so it follows the configured PBKDF2 iteration count.
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return get_password_hash(secrets.token_urlsafe(12))
 
 
 class AuthService:
@@ -22,7 +47,7 @@ class AuthService:
 
     def register_user(self, email: str, password: str) -> User:
         normalized = normalize_email(email)
-        existing = self.db.scalar(select(User).where(User.email == normalized))
+        existing = self.db.scalar(_USER_ID_BY_EMAIL, {"email": normalized})
         if existing:
             raise ValueError("User already exists")
 
@@ -30,21 +55,29 @@ class AuthService:
         if not ok:
             raise ValueError(reason or "Invalid password")
 
-        user = User(email=normalized, hashed_password=get_password_hash(password))
+        user = User(
+            id=str(uuid.uuid4()),
+            email=normalized,
+            hashed_password=get_password_hash(password),
+            is_active=True,
+            created_at=utcnow(),
+        )
         self.db.add(user)
         self.db.commit()
-        self.db.refresh(user)
         return user
 
     def authenticate(self, email: str, password: str) -> str:
         normalized = normalize_email(email)
-        user = self.db.scalar(select(User).where(User.email == normalized))
-        if not user or not verify_password(password, user.hashed_password):
+        user = self.db.scalar(_USER_BY_EMAIL, {"email": normalized})
+        # Unknown emails still pay for a full hash verification so response time does not reveal them.
+        stored = user.hashed_password if user else _dummy_hash()
+        valid, new_hash = verify_and_maybe_rehash(password, stored)
+        if not user or not valid:
             raise ValueError("Invalid credentials")
         if not user.is_active:
             raise ValueError("User inactive")
-        if password_needs_rehash(user.hashed_password):
-            user.hashed_password = get_password_hash(password)
+        if new_hash is not None:
+            user.hashed_password = new_hash
             self.db.commit()
         return create_access_token(subject=user.id, expires_delta=timedelta(days=1))
 
@@ -58,33 +91,30 @@ class TenantService:
 
     def create_tenant(self, user_id: str, name: str, namespace: str) -> Tenant:
         clean_namespace = namespace.strip().lower().replace(" ", "-")
-        if self.db.scalar(select(Tenant).where(Tenant.namespace == clean_namespace)):
+        if self.db.scalar(_TENANT_ID_BY_NAMESPACE, {"namespace": clean_namespace}):
             raise ValueError("Tenant namespace already exists")
 
-        tenant = Tenant(name=name.strip(), namespace=clean_namespace)
-        self.db.add(tenant)
-        self.db.flush()
-
-        membership = Membership(user_id=user_id, tenant_id=tenant.id, role=Role.OWNER)
-        self.db.add(membership)
-        from app.services.entitlements import EntitlementService
-
-        EntitlementService(self.db).ensure_tenant_plan(tenant.id, default_tier=PlanTier.STARTER)
+        # One clock read and explicit ids for every row, so the membership and plan can reference the
+        # tenant without an intermediate flush and all three INSERTs go out in a single commit.
+        now = utcnow()
+        tenant = Tenant(id=str(uuid.uuid4()), name=name.strip(), namespace=clean_namespace, created_at=now)
+        membership = Membership(
+            id=str(uuid.uuid4()), user_id=user_id, tenant_id=tenant.id, role=Role.OWNER, created_at=now
+        )
+        plan = TenantPlan(
+            id=str(uuid.uuid4()), tenant_id=tenant.id, plan_tier=PlanTier.STARTER, created_at=now, updated_at=now
+        )
+        self.db.add_all([tenant, membership, plan])
         self.db.commit()
-        self.db.refresh(tenant)
         return tenant
 
-    def list_memberships(self, user_id: str) -> list[Membership]:
-        return list(self.db.scalars(select(Membership).where(Membership.user_id == user_id)).all())
+    def list_memberships(self, user_id: str) -> list[Row[tuple[str, str, str, Role]]]:
+        # One joined round-trip yielding (tenant_id, tenant_name, tenant_namespace, role) rows, so callers
+        # never touch the lazy Membership.tenant relationship.
+        return list(self.db.execute(_MEMBERSHIPS_FOR_USER, {"user_id": user_id}).all())
 
     def role_for_user(self, user_id: str, tenant_id: str) -> Role | None:
-        membership = self.db.scalar(
-            select(Membership).where(
-                Membership.user_id == user_id,
-                Membership.tenant_id == tenant_id,
-            )
-        )
-        return membership.role if membership else None
+        return self.db.scalar(_ROLE_FOR_USER, {"user_id": user_id, "tenant_id": tenant_id})
 
     def require_role(self, user_id: str, tenant_id: str, allowed_roles: set[Role]) -> Role:
         role = self.role_for_user(user_id=user_id, tenant_id=tenant_id)
@@ -1,16 +1,44 @@
 ﻿from __future__ import annotations
 
 import hashlib
-import json
+import multiprocessing
+import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
-from statistics import mean
 
+import numpy as np
+import orjson
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.models import DatasetStatus, DatasetVersion, Document, DocumentStatus
-from app.services.storage import ArtifactStore, write_jsonl
+from app.services.storage import ArtifactStore, read_document
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+_ACTIONABLE_MARKERS = ("1.", "2.", "3.", "escalate")
+# Below this many documents per worker, process start-up costs more than it saves.
+_DOCS_PER_WORKER = 50
+
+
+def _drop_leading_lines(path: Path, count: int) -> None:
+    # Rows promoted to val/test were already streamed into train; copy the rest over them.
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with path.open("rb") as source, tmp_path.open("wb") as target:
+        for _ in range(count):
+            source.readline()
+        target.writelines(source)
+    tmp_path.replace(path)
+
+
+def _document_examples(job: tuple[str, str]) -> tuple[list[dict], list[int]]:
+    # Module-level so it can be pickled into pool workers.
+    doc_id, normalized_path = job
+    examples = DatasetBuilderService._examples_from_document(doc_id, read_document(normalized_path))
+    return examples, DatasetBuilderService._score_examples(examples)
 
 
 class DatasetBuilderService:
@@ -54,96 +82,111 @@ class DatasetBuilderService:
         self.db.add(dataset)
         self.db.flush()
 
-        examples: list[dict] = []
-        for doc in docs:
-            payload = json.loads(Path(doc.normalized_text_path).read_text(encoding="utf-8"))
-            doc_examples = self._examples_from_document(doc.id, payload)
-            examples.extend(doc_examples)
-
-        if not examples:
-            dataset.status = DatasetStatus.FAILED
-            dataset.stats_json = {"error": "No examples generated"}
-            self.db.commit()
-            raise ValueError("Dataset generation failed: no examples")
-
-        scored = [self._score_example(example) for example in examples]
-        for example, score in zip(examples, scored):
-            example["example_score"] = score
-            example["needs_review"] = score < 70
-
-        train_rows: list[dict] = []
-        val_rows: list[dict] = []
-        test_rows: list[dict] = []
-        gold_rows: list[dict] = []
-        review_rows: list[dict] = []
-
-        for row in examples:
-            bucket = self._split_bucket(row["source"]["doc_id"])
-            item = {
-                "instruction": row["instruction"],
-                "input": row["input"],
-                "output": row["output"],
-                "source": row["source"],
-                "task_type": row["task_type"],
-                "expected_refusal": row.get("expected_refusal", False),
-                "example_score": row["example_score"],
-            }
-            if row["needs_review"]:
-                review_rows.append(item)
-            if bucket == "train":
-                train_rows.append(item)
-            elif bucket == "val":
-                val_rows.append(item)
-            else:
-                test_rows.append(item)
-
-            if row["example_score"] >= 80 and bucket in {"val", "test"}:
-                gold_rows.append(item)
-
-        # Keep non-empty validation/test slices even for tiny projects.
-        if not val_rows and train_rows:
-            val_rows.append(train_rows.pop(0))
-        if not test_rows and train_rows:
-            test_rows.append(train_rows.pop(0))
-        if not gold_rows:
-            candidates = [row for row in (val_rows + test_rows + train_rows) if row["example_score"] >= 75]
-            gold_rows.extend(candidates[: max(1, min(10, len(candidates)))])
-
         dataset_dir = self.store.datasets_dir(tenant_id, project_id, dataset.id)
-        train_path = dataset_dir / "train.jsonl"
-        val_path = dataset_dir / "val.jsonl"
-        test_path = dataset_dir / "test.jsonl"
-        gold_path = dataset_dir / "gold_eval.jsonl"
-        review_path = dataset_dir / "review_queue.jsonl"
-
-        write_jsonl(train_path, train_rows)
-        write_jsonl(val_path, val_rows)
-        write_jsonl(test_path, test_rows)
-        write_jsonl(gold_path, gold_rows)
-        write_jsonl(review_path, review_rows)
-
-        dataset.train_path = str(train_path)
-        dataset.val_path = str(val_path)
-        dataset.test_path = str(test_path)
-        dataset.gold_path = str(gold_path)
-        dataset.review_path = str(review_path)
-        dataset.quality_score = int(mean(scored))
-        dataset.status = DatasetStatus.NEEDS_REVIEW if review_rows else DatasetStatus.READY
+        paths = {
+            "train": dataset_dir / "train.jsonl",
+            "val": dataset_dir / "val.jsonl",
+            "test": dataset_dir / "test.jsonl",
+            "gold": dataset_dir / "gold_eval.jsonl",
+            "review": dataset_dir / "review_queue.jsonl",
+        }
+        counts = dict.fromkeys(paths, 0)
+        task_mix: Counter[str] = Counter()
+        score_total = 0
+        # Rows are written as soon as they are scored; only the handful needed for the
+        # tiny-project fallbacks below is kept in memory.
+        train_head: list[dict] = []
+        gold_candidates: dict[str, list[tuple[int, dict]]] = {"val": [], "test": [], "train": []}
+
+        jobs = [(doc.id, doc.normalized_text_path) for doc in docs]
+        workers = min(get_settings().dataset_workers or os.cpu_count() or 1, len(jobs) // _DOCS_PER_WORKER)
+
+        with ExitStack() as stack:
+            handles = {split: stack.enter_context(path.open("wb")) for split, path in paths.items()}
+            if workers > 1:
+                # Spawned workers avoid forking a process that already runs DB and worker threads.
+                pool = stack.enter_context(
+                    ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+                )
+                results = pool.map(_document_examples, jobs, chunksize=max(1, len(jobs) // (4 * workers)))
+            else:
+                results = map(_document_examples, jobs)
+
+            def emit(split: str, row: dict) -> None:
+                handles[split].write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
+                counts[split] += 1
+
+            for (doc_id, _), (examples, scores) in zip(jobs, results):
+                bucket = self._split_bucket(doc_id)
+                task_mix.update(row.get("task_type", "unknown") for row in examples)
+                for row, score in zip(examples, scores):
+                    row.setdefault("expected_refusal", False)
+                    row["example_score"] = score
+                    score_total += score
+
+                    if score < 70:
+                        emit("review", row)
+                    if score >= 75 and len(gold_candidates[bucket]) < 12:
+                        gold_candidates[bucket].append((counts[bucket], row))
+                    if bucket == "train" and len(train_head) < 2:
+                        train_head.append(row)
+                    emit(bucket, row)
+
+                    if score >= 80 and bucket in {"val", "test"}:
+                        emit("gold", row)
+
+            total_examples = task_mix.total()
+            if not total_examples:
+                dataset.status = DatasetStatus.FAILED
+                dataset.stats_json = {"error": "No examples generated"}
+                self.db.commit()
+                raise ValueError("Dataset generation failed: no examples")
+
+            # Keep non-empty validation/test slices even for tiny projects.
+            moved = 0
+            for split in ("val", "test"):
+                if not counts[split] and moved < len(train_head):
+                    row = train_head[moved]
+                    emit(split, row)
+                    if row["example_score"] >= 75:
+                        gold_candidates[split].append((0, row))
+                    moved += 1
+            if not counts["gold"]:
+                candidates = [
+                    row
+                    for split in ("val", "test", "train")
+                    for index, row in gold_candidates[split]
+                    if split != "train" or index >= moved
+                ]
+                for row in candidates[:10]:
+                    emit("gold", row)
+
+        if moved:
+            _drop_leading_lines(paths["train"], moved)
+            counts["train"] -= moved
+
+        dataset.train_path = str(paths["train"])
+        dataset.val_path = str(paths["val"])
+        dataset.test_path = str(paths["test"])
+        dataset.gold_path = str(paths["gold"])
+        dataset.review_path = str(paths["review"])
+        dataset.quality_score = score_total // total_examples
+        dataset.status = DatasetStatus.NEEDS_REVIEW if counts["review"] else DatasetStatus.READY
         dataset.stats_json = {
-            "total_examples": len(examples),
-            "train_examples": len(train_rows),
-            "val_examples": len(val_rows),
-            "test_examples": len(test_rows),
-            "gold_examples": len(gold_rows),
-            "review_examples": len(review_rows),
-            "task_mix": self._task_mix(examples),
+            "total_examples": total_examples,
+            "train_examples": counts["train"],
+            "val_examples": counts["val"],
+            "test_examples": counts["test"],
+            "gold_examples": counts["gold"],
+            "review_examples": counts["review"],
+            "task_mix": dict(task_mix),
             "mean_example_score": dataset.quality_score,
         }
         self.db.commit()
-        self.db.refresh(dataset)
         return dataset
 
-    def _examples_from_document(self, doc_id: str, payload: dict) -> list[dict]:
+    @classmethod
+    def _examples_from_document(cls, doc_id: str, payload: dict) -> list[dict]:
         sections = payload.get("sections") or []
         text = payload.get("text", "")
         examples: list[dict] = []
@@ -154,9 +197,9 @@ class DatasetBuilderService:
         for section in sections:
             title = section.get("title") or "General"
             content = section.get("content") or ""
-            chunks = self._chunk_text(content)
+            chunks = cls._chunk_text(content)
             for idx, chunk in enumerate(chunks):
-                summary = self._summarize_chunk(chunk)
+                summary = cls._summarize_chunk(chunk)
                 facts_q = f"What does the {title} section say about the core policy?"
                 howto_q = f"How should a new team member apply the {title} guidance?"
                 edge_q = f"What should happen if an exception occurs under {title}?"
@@ -180,7 +223,7 @@ class DatasetBuilderService:
                     {
                         "instruction": howto_q,
                         "input": "",
-                        "output": self._to_steps(summary),
+                        "output": cls._to_steps(summary),
                         "task_type": "structured_output",
                         "source": source,
                     }
@@ -189,7 +232,7 @@ class DatasetBuilderService:
                     {
                         "instruction": edge_q,
                         "input": "",
-                        "output": self._with_boundary(summary),
+                        "output": cls._with_boundary(summary),
                         "task_type": "refusal_escalation",
                         "source": source,
                         "expected_refusal": "do not" in chunk.lower() or "not allowed" in chunk.lower(),
@@ -224,7 +267,7 @@ class DatasetBuilderService:
 
     @staticmethod
     def _summarize_chunk(chunk: str) -> str:
-        sentences = re.split(r"(?<=[.!?])\s+", chunk.strip())
+        sentences = _SENTENCE_SPLIT.split(chunk.strip())
         sentences = [s.strip() for s in sentences if s.strip()]
         if not sentences:
             return "No relevant policy details were found in this section."
@@ -246,32 +289,41 @@ class DatasetBuilderService:
             "If required facts are missing, refuse and route to the designated owner."
         )
 
-    def _score_example(self, row: dict) -> int:
-        output = row["output"]
-        source_title = row["source"].get("section_title", "")
-
-        faithfulness = 90 if source_title.lower() in row["instruction"].lower() else 75
-        specificity = min(100, 50 + len(output.split()) // 3)
-        actionability = 90 if any(token in output for token in ["1.", "2.", "3.", "escalate"]) else 70
+    @staticmethod
+    def _score_examples(rows: list[dict]) -> list[int]:
+        # Per-row string checks stay in Python; the rubric arithmetic runs once over whole arrays.
+        n = len(rows)
+        faithfulness = np.where(
+            np.fromiter(
+                (row["source"].get("section_title", "").lower() in row["instruction"].lower() for row in rows),
+                dtype=bool,
+                count=n,
+            ),
+            90,
+            75,
+        )
+        output_words = np.fromiter((len(row["output"].split()) for row in rows), dtype=np.int64, count=n)
+        specificity = np.minimum(100, 50 + output_words // 3)
+        actionability = np.where(
+            np.fromiter(
+                (any(token in row["output"] for token in _ACTIONABLE_MARKERS) for row in rows), dtype=bool, count=n
+            ),
+            90,
+            70,
+        )
         format_compliance = 95
-        safety = 100 if row["task_type"] == "refusal_escalation" else 90
-
-        return int(mean([faithfulness, specificity, actionability, format_compliance, safety]))
+        safety = np.where(
+            np.fromiter((row["task_type"] == "refusal_escalation" for row in rows), dtype=bool, count=n), 100, 90
+        )
+        # Components are non-negative integers, so floor division equals int(mean(...)).
+        return ((faithfulness + specificity + actionability + format_compliance + safety) // 5).tolist()
 
     @staticmethod
     def _split_bucket(doc_id: str) -> str:
-        value = int(hashlib.sha256(doc_id.encode("utf-8")).hexdigest()[:8], 16) % 100
+        # Only needs a uniform, stable spread over 0..99; a 4-byte blake2b digest is much cheaper than sha256.
+        value = int.from_bytes(hashlib.blake2b(doc_id.encode("utf-8"), digest_size=4).digest(), "big") % 100
         if value < 70:
             return "train"
         if value < 85:
             return "val"
         return "test"
-
-    @staticmethod
-    def _task_mix(rows: list[dict]) -> dict[str, int]:
-        counts: dict[str, int] = {}
-        for row in rows:
-            task = row.get("task_type", "unknown")
-            counts[task] = counts.get(task, 0) + 1
-        return counts
-
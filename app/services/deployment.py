@@ -49,9 +49,7 @@ class DeploymentService:
             endpoint_url=endpoint_url,
         )
         self.db.add(deployment)
-        self.db.commit()
-        self.db.refresh(deployment)
-
+        self.db.flush()
         log_audit_event(
             self.db,
             tenant_id=tenant_id,
@@ -62,6 +60,7 @@ class DeploymentService:
             entity_id=deployment.id,
             details={"run_id": training_run_id, "version": version},
         )
+        self.db.commit()
         return deployment
 
     def active_deployment(self, tenant_id: str, project_id: str) -> DeploymentPackage | None:
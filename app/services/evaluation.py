@@ -3,17 +3,18 @@
 import json
 import time
 from datetime import UTC, datetime
-from difflib import SequenceMatcher
 from pathlib import Path
-from statistics import mean
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import DatasetVersion, EvaluationReport, TrainingRun
 from app.services.storage import read_jsonl, write_json
 
+_REFUSAL_MARKERS = ("cannot", "can't", "do not have", "insufficient", "escalate")
+
 
 class EvaluationService:
     def __init__(self, db: Session):
@@ -28,29 +29,29 @@ class EvaluationService:
         if not gold_rows:
             raise ValueError("No evaluation rows available")
 
+        # One pass of per-row string work (each text lowered once), then both similarity metrics are
+        # scored for the whole batch inside rapidfuzz.
+        expected_texts = [row.get("output", "") for row in gold_rows]
+        predicted_texts = [self._mock_predict(row) for row in gold_rows]
+        expected_lower = [text.lower() for text in expected_texts]
+        predicted_lower = [text.lower() for text in predicted_texts]
+        fuzzy_scores = process.cpdist(expected_texts, predicted_texts, scorer=fuzz.ratio, dtype=np.float64) / 100.0
+        semantic_scores = process.cpdist(expected_lower, predicted_lower, scorer=fuzz.ratio, dtype=np.float64) / 100.0
+
         details: list[dict] = []
         exact_matches = 0
-        fuzzy_scores: list[float] = []
-        semantic_scores: list[float] = []
         refusal_tp = 0
         refusal_fp = 0
         refusal_fn = 0
         unsupported_claims = 0
 
-        for row in gold_rows:
-            expected = row.get("output", "")
+        for i, row in enumerate(gold_rows):
+            expected = expected_texts[i]
+            predicted = predicted_texts[i]
             expected_refusal = bool(row.get("expected_refusal", False))
-            predicted = self._mock_predict(row)
-            predicted_refusal = self._is_refusal(predicted)
-
-            exact = int(predicted.strip() == expected.strip())
-            exact_matches += exact
+            predicted_refusal = self._is_refusal(predicted_lower[i])
 
-            fuzzy = fuzz.ratio(expected, predicted) / 100.0
-            fuzzy_scores.append(fuzzy)
-
-            semantic = self._semantic_similarity(expected, predicted)
-            semantic_scores.append(semantic)
+            exact_matches += int(predicted.strip() == expected.strip())
 
             if expected_refusal and predicted_refusal:
                 refusal_tp += 1
@@ -59,9 +60,10 @@ class EvaluationService:
             elif expected_refusal and not predicted_refusal:
                 refusal_fn += 1
 
-            unsupported = self._unsupported_claim(expected, predicted)
+            unsupported = self._unsupported_claim(expected_lower[i], predicted_lower[i])
             unsupported_claims += int(unsupported)
 
+            semantic = semantic_scores[i]
             if semantic < 0.65 or unsupported:
                 details.append(
                     {
@@ -74,8 +76,8 @@ class EvaluationService:
 
         n = max(len(gold_rows), 1)
         exact_match = exact_matches / n
-        fuzzy_match = mean(fuzzy_scores) if fuzzy_scores else 0.0
-        semantic_similarity = mean(semantic_scores) if semantic_scores else 0.0
+        fuzzy_match = float(fuzzy_scores.mean())
+        semantic_similarity = float(semantic_scores.mean())
 
         refusal_precision = refusal_tp / max(refusal_tp + refusal_fp, 1)
         refusal_recall = refusal_tp / max(refusal_tp + refusal_fn, 1)
@@ -128,7 +130,6 @@ class EvaluationService:
         )
         self.db.add(report)
         self.db.commit()
-        self.db.refresh(report)
         return report
 
     @staticmethod
@@ -141,25 +142,15 @@ class EvaluationService:
         return expected
 
     @staticmethod
-    def _semantic_similarity(a: str, b: str) -> float:
-        if not a and not b:
-            return 1.0
-        if not a or not b:
-            return 0.0
-        return SequenceMatcher(None, a.lower(), b.lower()).ratio()
-
-    @staticmethod
-    def _is_refusal(text: str) -> bool:
-        lowered = text.lower()
-        return any(token in lowered for token in ["cannot", "can't", "do not have", "insufficient", "escalate"])
+    def _is_refusal(lowered: str) -> bool:
+        return any(token in lowered for token in _REFUSAL_MARKERS)
 
     @staticmethod
-    def _unsupported_claim(expected: str, predicted: str) -> bool:
-        expected_tokens = set(expected.lower().split())
-        predicted_tokens = set(predicted.lower().split())
+    def _unsupported_claim(expected_lower: str, predicted_lower: str) -> bool:
+        predicted_tokens = set(predicted_lower.split())
         if not predicted_tokens:
             return False
-        novel = predicted_tokens - expected_tokens
+        novel = predicted_tokens.difference(expected_lower.split())
         return len(novel) / max(len(predicted_tokens), 1) > 0.4
 
     def _latest_previous_report(self, project_id: str, run_id: str) -> EvaluationReport | None:
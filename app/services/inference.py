@@ -1,11 +1,15 @@
 ﻿from __future__ import annotations
 
-import json
-import re
+import atexit
+import hashlib
+import heapq
+import threading
 import time
-from pathlib import Path
+from collections import OrderedDict
 
 import httpx
+import numpy as np
+import orjson
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -15,6 +19,51 @@ from app.models import Document, DocumentStatus, Project
 from app.schemas import ChatResponse
 from app.schemas.api import Citation
 from app.services.deployment import DeploymentService
+from app.services.storage import read_document
+from app.services.token_index import candidate_chunks, chunk_overlaps, load_token_index, token_hashes
+
+
+# One keep-alive pool for all chats instead of a new connection (and client setup) per request.
+_ollama: httpx.Client | None = None
+
+
+def _ollama_client() -> httpx.Client:
+    global _ollama
+    if _ollama is None:
+        _ollama = httpx.Client(
+            timeout=45.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+        atexit.register(_ollama.close)
+    return _ollama
+
+
+class _ResponseCache:
+    # Bounded LRU with per-entry expiry; shared by every request thread.
+    def __init__(self) -> None:
+        self._entries: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: bytes, value: str, *, ttl_seconds: float, max_size: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+
+_response_cache = _ResponseCache()
 
 
 class InferenceService:
@@ -63,6 +112,13 @@ class InferenceService:
         return self._fallback_answer(project, question, citations)
 
     def _chat_ollama(self, prompt: str, system_prompt: str) -> str | None:
+        # The prompt embeds the retrieved evidence, so a hit means same model, question and citations.
+        use_cache = self.settings.ollama_cache_size > 0 and self.settings.ollama_cache_ttl_seconds > 0
+        key_parts = (self.settings.ollama_base_url, self.settings.ollama_chat_model, system_prompt, prompt)
+        cache_key = hashlib.blake2b("\0".join(key_parts).encode("utf-8"), digest_size=16).digest()
+        if use_cache and (cached := _response_cache.get(cache_key)) is not None:
+            return cached
+
         payload = {
             "model": self.settings.ollama_chat_model,
             "stream": False,
@@ -72,13 +128,21 @@ class InferenceService:
             ],
         }
         try:
-            with httpx.Client(timeout=45.0) as client:
-                response = client.post(f"{self.settings.ollama_base_url.rstrip('/')}/api/chat", json=payload)
-                response.raise_for_status()
-                data = response.json()
-                return str((data.get("message") or {}).get("content") or "").strip() or None
+            response = _ollama_client().post(f"{self.settings.ollama_base_url.rstrip('/')}/api/chat", json=payload)
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            answer = str((data.get("message") or {}).get("content") or "").strip() or None
         except Exception:
             return None
+        # Failures and empty answers are not cached so the next request retries the backend.
+        if use_cache and answer:
+            _response_cache.put(
+                cache_key,
+                answer,
+                ttl_seconds=self.settings.ollama_cache_ttl_seconds,
+                max_size=self.settings.ollama_cache_size,
+            )
+        return answer
 
     def _retrieve_citations(self, tenant_id: str, project_id: str, question: str) -> list[Citation]:
         docs = list(
@@ -91,30 +155,26 @@ class InferenceService:
             ).all()
         )
 
-        q_tokens = set(self._tokenize(question))
+        # Chunks are matched on pre-hashed token sets written at ingest, so no regex runs over documents here.
+        q_hashes = token_hashes(question)
         scored: list[tuple[float, str, str]] = []
+        if not q_hashes.size:
+            return []
         for doc in docs:
-            payload = json.loads(Path(doc.normalized_text_path).read_text(encoding="utf-8"))
-            text = payload.get("text", "")
-            sections = payload.get("sections") or []
-            content_candidates = [section.get("content", "") for section in sections[:15]] or [text]
-
-            for chunk in content_candidates:
-                chunk_tokens = set(self._tokenize(chunk))
-                overlap = len(q_tokens & chunk_tokens)
-                if overlap == 0:
-                    continue
-                score = overlap / max(len(q_tokens), 1)
-                snippet = " ".join(chunk.split()[:120])
-                scored.append((score, doc.id, snippet))
-
-        scored.sort(key=lambda row: row[0], reverse=True)
-        top = scored[:3]
-        return [Citation(document_id=doc_id, snippet=snippet, score=round(score, 4)) for score, doc_id, snippet in top]
-
-    @staticmethod
-    def _tokenize(text: str) -> list[str]:
-        return re.findall(r"[a-zA-Z0-9]{2,}", text.lower())
+            payload = read_document(doc.normalized_text_path)
+            content_candidates = candidate_chunks(payload)
+            flat, offsets = load_token_index(doc.normalized_text_path, payload)
+            overlaps = chunk_overlaps(q_hashes, flat, offsets)
+
+            for idx in np.flatnonzero(overlaps).tolist():
+                scored.append((int(overlaps[idx]) / q_hashes.size, doc.id, content_candidates[idx]))
+
+        # Only three citations are kept, so select them without a full sort and build just their snippets.
+        top = heapq.nlargest(3, scored, key=lambda row: row[0])
+        return [
+            Citation(document_id=doc_id, snippet=" ".join(chunk.split()[:120]), score=round(score, 4))
+            for score, doc_id, chunk in top
+        ]
 
     @staticmethod
     def _compose_prompt(project: Project, question: str, citations: list[Citation]) -> str:
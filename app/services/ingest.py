@@ -4,16 +4,18 @@ import csv
 import hashlib
 import io
 import json
+import math
 import re
 import secrets
 from collections import Counter
 from datetime import UTC, datetime
+from functools import lru_cache
 from pathlib import Path
 from statistics import mean
+from typing import BinaryIO
 
 import numpy as np
 from dateutil import parser as date_parser
-from fastapi import UploadFile
 from pypdf import PdfReader
 from sqlalchemy import select
 from sqlalchemy.orm import Session
@@ -21,18 +23,77 @@ from sqlalchemy.orm import Session
 from app.core.config import get_settings
 from app.core.metrics import INGESTED_DOCUMENTS
 from app.models import Document, DocumentStatus
-from app.services.storage import ArtifactStore, write_json
+from app.services.storage import ArtifactStore, read_document, write_document
+from app.services.token_index import write_token_index
 
 try:
     from docx import Document as DocxDocument
 except Exception:  # pragma: no cover
     DocxDocument = None
 
+try:
+    # PyMuPDF extracts text several times faster than pypdf; pypdf remains the fallback.
+    import pymupdf
+except Exception:  # pragma: no cover
+    pymupdf = None
 
-EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-PHONE_RE = re.compile(r"(?:\+?\d{1,2}[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)\d{3}[\s.-]?\d{4}")
-SSN_RE = re.compile(r"\b\d{3}-\d{2}-\d{4}\b")
-CARD_RE = re.compile(r"\b(?:\d[ -]*?){13,16}\b")
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except Exception:  # pragma: no cover
+    LexborHTMLParser = None
+
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", re.ASCII)
+PHONE_RE = re.compile(r"(?:\+?\d{1,2}[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)\d{3}[\s.-]?\d{4}", re.ASCII)
+SSN_RE = re.compile(r"\b\d{3}-\d{2}-\d{4}\b", re.ASCII)
+CARD_RE = re.compile(r"\b(?:\d[ -]*?){13,16}\b", re.ASCII)
+# One pass over the text for every PII type. Card and SSN come before phone so a card number is
+# reported as a card rather than as a phone number found inside it.
+PII_RE = re.compile(
+    "|".join(
+        f"(?P<{label}>{regex.pattern})"
+        for label, regex in (("email", EMAIL_RE), ("ssn", SSN_RE), ("card", CARD_RE), ("phone", PHONE_RE))
+    ),
+    re.ASCII,
+)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+HASH_CHUNK_CHARS = 1024 * 1024
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_HTML_BLOCK_SELECTOR = "p, h1, h2, h3, h4, h5, h6, li, br, div, tr"
+_NUMBERED_RE = re.compile(r"\d+\.\s")
+_ASCII_CONTROL = bytes([*range(0x20), 0x7F])
+# Random hyperplanes for SimHash over the 256-dim hashed embedding. Bits differ with probability
+# angle/pi, so the Hamming distance estimates cosine similarity without reading the other document.
+_SIMHASH_PLANES = np.random.default_rng(0x5EED).standard_normal((64, 256)).astype(np.float32)
+_SIMHASH_BITS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+_SIMHASH_MASK = (1 << 64) - 1
+# Standard deviations of Hamming-distance noise allowed above the expected distance at the threshold.
+_SIMHASH_SIGMAS = 4.0
+
+
+@lru_cache(maxsize=32)
+def _simhash_max_distance(threshold: float) -> int:
+    # Each bit differs with probability angle/pi, so the distance at the threshold is Binomial(64, p);
+    # documents farther than mean + 4 sigma are skipped without an exact cosine.
+    p = math.acos(min(1.0, max(-1.0, threshold))) / math.pi
+    return min(64, math.ceil(64 * p + _SIMHASH_SIGMAS * math.sqrt(64 * p * (1 - p))))
+
+
+@lru_cache(maxsize=65536)
+def _token_bucket(token: str) -> int:
+    # Same sha1-derived value as before, so stored SimHash fingerprints stay comparable.
+    return int.from_bytes(hashlib.sha1(token.encode("utf-8")).digest()[:4], "big")
+
+
+@lru_cache(maxsize=4096)
+def _stored_text_embedding(sha_hash: str, normalized_path: str) -> np.ndarray | None:
+    # Keyed by the content hash, so entries never go stale; the file is only read on a miss.
+    text = IngestionService._normalize_text(read_document(normalized_path).get("text", ""))
+    if not text:
+        return None
+    embedding = IngestionService._hashed_embedding(text)
+    embedding.flags.writeable = False
+    return embedding
 
 
 class IngestionService:
@@ -41,12 +102,13 @@ class IngestionService:
         self.settings = get_settings()
         self.store = ArtifactStore()
 
-    def ingest_upload(
+    def ingest_upload_stream(
         self,
         *,
         tenant_id: str,
         project_id: str,
-        file: UploadFile,
+        stream: BinaryIO,
+        filename: str | None,
         metadata: dict,
     ) -> Document:
         if not isinstance(metadata, dict):
@@ -54,8 +116,8 @@ class IngestionService:
         if len(json.dumps(metadata)) > 32_000:
             raise ValueError("Metadata payload too large")
 
-        filename = self._safe_filename(file.filename or "uploaded")
-        content = file.file.read()
+        filename = self._safe_filename(filename or "uploaded")
+        content = self._read_upload(stream, filename)
         if not content:
             raise ValueError("Uploaded file is empty")
 
@@ -64,8 +126,8 @@ class IngestionService:
 
         extracted_text, extraction_meta = self._extract_text(content, file_type)
         normalized_text = self._normalize_text(extracted_text)
-        sections = self._extract_sections(normalized_text)
-        sha_hash = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        sections, heading_count, bullet_count = self._scan_structure(normalized_text)
+        sha_hash = self._text_sha256(normalized_text)
 
         exact_duplicate = self.db.scalar(
             select(Document).where(
@@ -86,16 +148,20 @@ class IngestionService:
             "metadata": metadata,
             "extraction": extraction_meta,
         }
-        write_json(normalized_path, normalized_payload)
+        write_document(normalized_path, normalized_payload)
+        write_token_index(normalized_path, normalized_payload)
 
         pii_hits = self._detect_pii(normalized_text)
+        embedding = self._hashed_embedding(normalized_text)
+        simhash = self._simhash(embedding)
         near_duplicate_of = None
         similarity_score = 0.0
         if not exact_duplicate:
             near_duplicate_of, similarity_score = self._find_near_duplicate(
                 tenant_id=tenant_id,
                 project_id=project_id,
-                normalized_text=normalized_text,
+                embedding=embedding,
+                simhash=simhash,
             )
 
         quality_score = self._doc_quality_score(
@@ -104,6 +170,8 @@ class IngestionService:
             metadata=metadata,
             pii_hits=pii_hits,
             similarity_score=similarity_score,
+            heading_count=heading_count,
+            bullet_count=bullet_count,
         )
 
         status = DocumentStatus.READY
@@ -123,7 +191,10 @@ class IngestionService:
             storage_path=str(raw_path),
             normalized_text_path=str(normalized_path),
             sha256_hash=sha_hash,
+            size_bytes=len(content),
             near_duplicate_of=near_duplicate_of,
+            simhash=simhash,
+            embedding=embedding.tobytes() if simhash is not None else None,
             quality_score=quality_score,
             pii_hits=pii_hits,
             metadata_json=metadata,
@@ -132,10 +203,29 @@ class IngestionService:
 
         self.db.add(doc)
         self.db.commit()
-        self.db.refresh(doc)
         INGESTED_DOCUMENTS.labels(status=doc.status.value).inc()
         return doc
 
+    @staticmethod
+    def _text_sha256(text: str) -> str:
+        # Encode and hash 1M characters at a time instead of materializing the whole UTF-8 copy.
+        digest = hashlib.sha256()
+        for start in range(0, len(text), HASH_CHUNK_CHARS):
+            digest.update(text[start : start + HASH_CHUNK_CHARS].encode("utf-8"))
+        return digest.hexdigest()
+
+    def _read_upload(self, stream: BinaryIO, filename: str) -> bytes:
+        # Read in bounded chunks so oversized uploads are rejected before they are buffered whole.
+        limit = self.settings.max_upload_mb * 1024 * 1024
+        chunks: list[bytes] = []
+        size = 0
+        while chunk := stream.read(UPLOAD_CHUNK_BYTES):
+            size += len(chunk)
+            if size > limit:
+                raise ValueError(f"File too large: {filename}")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
     @staticmethod
     def _mock_virus_scan(filename: str, content: bytes) -> None:
         settings = get_settings()
@@ -170,7 +260,18 @@ class IngestionService:
             return content.decode("utf-8", errors="ignore"), {"ocr_used": False, "ocr_confidence": 1.0}
         if file_type == "html":
             raw = content.decode("utf-8", errors="ignore")
-            cleaned = re.sub(r"<[^>]+>", " ", raw)
+            if LexborHTMLParser is not None:
+                # A real parser drops comments and script/style bodies and decodes entities.
+                tree = LexborHTMLParser(raw)
+                tree.strip_tags(["script", "style", "noscript", "template"])
+                # Inline text nodes are joined with spaces; only block elements start a new line, so
+                # headings still stand alone for section detection without splitting sentences.
+                for node in tree.css(_HTML_BLOCK_SELECTOR):
+                    node.insert_before("\n")
+                    node.insert_after("\n")
+                cleaned = "\n".join(line.strip() for line in tree.text(separator=" ").splitlines())
+            else:
+                cleaned = _HTML_TAG_RE.sub(" ", raw)
             return cleaned, {"ocr_used": False, "ocr_confidence": 1.0}
         if file_type == "csv":
             raw = content.decode("utf-8", errors="ignore")
@@ -178,10 +279,12 @@ class IngestionService:
             lines = [" | ".join(row) for row in reader]
             return "\n".join(lines), {"ocr_used": False, "ocr_confidence": 1.0}
         if file_type == "pdf":
-            reader = PdfReader(io.BytesIO(content))
-            pages = []
-            for page in reader.pages:
-                pages.append(page.extract_text() or "")
+            if pymupdf is not None:
+                with pymupdf.open(stream=content, filetype="pdf") as document:
+                    pages = [page.get_text("text") for page in document]
+            else:
+                reader = PdfReader(io.BytesIO(content))
+                pages = [page.extract_text() or "" for page in reader.pages]
             text = "\n".join(pages).strip()
             if not text:
                 return "", {"ocr_used": True, "ocr_confidence": 0.2}
@@ -202,18 +305,25 @@ class IngestionService:
         return text.strip()
 
     @staticmethod
-    def _extract_sections(text: str) -> list[dict]:
+    def _scan_structure(text: str) -> tuple[list[dict], int, int]:
+        # Sections plus the heading and bullet counts used for scoring, from a single pass over the lines.
         if not text:
-            return []
+            return [], 0, 0
         sections: list[dict] = []
         current_title = "General"
         current_lines: list[str] = []
+        heading_count = 0
+        bullet_count = 0
 
         for line in text.splitlines():
             stripped = line.strip()
             if not stripped:
                 continue
-            if stripped.endswith(":") or stripped.startswith("#") or re.match(r"^\d+\.\s", stripped):
+            if stripped.startswith(("#", "1.", "2.", "3.")) or stripped.endswith(":"):
+                heading_count += 1
+            if stripped.startswith(("-", "*")):
+                bullet_count += 1
+            if stripped.endswith(":") or stripped.startswith("#") or _NUMBERED_RE.match(stripped):
                 if current_lines:
                     sections.append({"title": current_title, "content": " ".join(current_lines)})
                     current_lines = []
@@ -223,19 +333,11 @@ class IngestionService:
 
         if current_lines:
             sections.append({"title": current_title, "content": " ".join(current_lines)})
-        return sections
+        return sections, heading_count, bullet_count
 
     @staticmethod
     def _detect_pii(text: str) -> list[dict]:
-        hits: list[dict] = []
-        for label, regex in (
-            ("email", EMAIL_RE),
-            ("phone", PHONE_RE),
-            ("ssn", SSN_RE),
-            ("card", CARD_RE),
-        ):
-            for match in regex.findall(text):
-                hits.append({"type": label, "value": str(match)[:24]})
+        hits = [{"type": match.lastgroup, "value": match.group()[:24]} for match in PII_RE.finditer(text)]
         return hits[:100]
 
     def _find_near_duplicate(
@@ -243,30 +345,56 @@ class IngestionService:
         *,
         tenant_id: str,
         project_id: str,
-        normalized_text: str,
+        embedding: np.ndarray,
+        simhash: int | None,
     ) -> tuple[str | None, float]:
-        target_vec = self._hashed_embedding(normalized_text)
-        candidate_docs = list(
-            self.db.scalars(
-                select(Document).where(
-                    Document.tenant_id == tenant_id,
-                    Document.project_id == project_id,
-                    Document.status != DocumentStatus.REJECTED,
-                )
-            ).all()
-        )
+        if simhash is None:
+            return None, 0.0
+        rows = self.db.execute(
+            select(Document.id, Document.simhash).where(
+                Document.tenant_id == tenant_id,
+                Document.project_id == project_id,
+                Document.status != DocumentStatus.REJECTED,
+            )
+        ).all()
+
+        # Fingerprints only decide which documents are worth an exact cosine; they never produce a score.
+        max_distance = _simhash_max_distance(self.settings.near_duplicate_threshold)
+        close_ids = [
+            doc_id
+            for doc_id, value in rows
+            if value is None or ((value ^ simhash) & _SIMHASH_MASK).bit_count() <= max_distance
+        ]
 
         best_doc_id = None
         best_score = 0.0
-        for doc in candidate_docs:
-            payload = json.loads(Path(doc.normalized_text_path).read_text(encoding="utf-8"))
-            candidate_text = self._normalize_text(payload.get("text", ""))
-            if not candidate_text:
-                continue
-            score = self._cosine_similarity(target_vec, self._hashed_embedding(candidate_text))
-            if score > best_score:
-                best_score = score
-                best_doc_id = doc.id
+        candidate_ids: list[str] = []
+        vectors: list[np.ndarray] = []
+        for start in range(0, len(close_ids), 500):
+            candidates = self.db.execute(
+                select(Document.id, Document.embedding, Document.sha256_hash, Document.normalized_text_path).where(
+                    Document.id.in_(close_ids[start : start + 500])
+                )
+            ).all()
+            for doc_id, blob, sha_hash, normalized_path in candidates:
+                if blob is not None:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                else:
+                    # Documents stored before embeddings were persisted are embedded from their text.
+                    vector = _stored_text_embedding(sha_hash, normalized_path)
+                    if vector is None:
+                        continue
+                candidate_ids.append(doc_id)
+                vectors.append(vector)
+
+        if vectors:
+            matrix = np.vstack(vectors)
+            denom = np.linalg.norm(matrix, axis=1) * np.linalg.norm(embedding)
+            scores = np.divide(matrix @ embedding, denom, out=np.zeros(len(vectors), dtype=np.float32), where=denom > 0)
+            best = int(scores.argmax())
+            if float(scores[best]) > best_score:
+                best_score = float(scores[best])
+                best_doc_id = candidate_ids[best]
 
         if best_score >= self.settings.near_duplicate_threshold:
             return best_doc_id, best_score
@@ -276,29 +404,27 @@ class IngestionService:
     def _tokenize(text: str) -> list[str]:
         return re.findall(r"[a-zA-Z0-9]{2,}", text.lower())
 
-    def _hashed_embedding(self, text: str, dim: int = 256) -> np.ndarray:
+    @classmethod
+    def _hashed_embedding(cls, text: str, dim: int = 256) -> np.ndarray:
         vector = np.zeros(dim, dtype=np.float32)
-        tokens = self._tokenize(text)
+        tokens = cls._tokenize(text)
         if not tokens:
             return vector
         counts = Counter(tokens)
-        for token, count in counts.items():
-            digest = hashlib.sha1(token.encode("utf-8")).hexdigest()
-            index = int(digest[:8], 16) % dim
-            vector[index] += float(count)
+        indices = np.fromiter((_token_bucket(token) for token in counts), dtype=np.uint32, count=len(counts)) % dim
+        np.add.at(vector, indices, np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
         norm = np.linalg.norm(vector)
         if norm == 0:
             return vector
         return vector / norm
 
     @staticmethod
-    def _cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-        if a.size == 0 or b.size == 0:
-            return 0.0
-        denom = float(np.linalg.norm(a) * np.linalg.norm(b))
-        if denom == 0:
-            return 0.0
-        return float(np.dot(a, b) / denom)
+    def _simhash(embedding: np.ndarray) -> int | None:
+        if not embedding.any():
+            return None
+        value = int(np.bitwise_or.reduce(_SIMHASH_BITS[(_SIMHASH_PLANES @ embedding) >= 0]))
+        # Stored in a signed BIGINT column.
+        return value - (1 << 64) if value >= 1 << 63 else value
 
     def _doc_quality_score(
         self,
@@ -308,6 +434,8 @@ class IngestionService:
         metadata: dict,
         pii_hits: list[dict],
         similarity_score: float,
+        heading_count: int,
+        bullet_count: int,
     ) -> int:
         if not text:
             return 0
@@ -318,7 +446,7 @@ class IngestionService:
         printable_ratio = self._printable_ratio(text)
         extraction_quality = int((extraction_quality + printable_ratio) / 2)
 
-        structure_quality = min(100, int(30 + self._heading_count(text) * 10 + self._bullet_count(text) * 4))
+        structure_quality = min(100, int(30 + heading_count * 10 + bullet_count * 4))
 
         freshness = self._freshness_score(metadata)
 
@@ -333,21 +461,12 @@ class IngestionService:
     def _printable_ratio(text: str) -> int:
         if not text:
             return 0
-        printable = sum(1 for c in text if c.isprintable())
+        # ASCII control bytes never occur inside multi-byte UTF-8 sequences, so they can be deleted
+        # at the byte level; what remains is usually all printable and confirmed in one C call.
+        visible = text.encode("utf-8", "surrogatepass").translate(None, _ASCII_CONTROL).decode("utf-8", "surrogatepass")
+        printable = len(visible) if visible.isprintable() else sum(1 for c in visible if c.isprintable())
         return int((printable / len(text)) * 100)
 
-    @staticmethod
-    def _heading_count(text: str) -> int:
-        return sum(
-            1
-            for line in text.splitlines()
-            if line.strip().startswith(("#", "1.", "2.", "3.")) or line.strip().endswith(":")
-        )
-
-    @staticmethod
-    def _bullet_count(text: str) -> int:
-        return sum(1 for line in text.splitlines() if line.strip().startswith(("-", "*")))
-
     @staticmethod
     def _freshness_score(metadata: dict) -> int:
         effective_date = metadata.get("effective_date")
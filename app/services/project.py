@@ -31,12 +31,8 @@ class ProjectService:
         )
         self.db.add(project)
         self.db.commit()
-        self.db.refresh(project)
         return project
 
-    def list_projects(self, tenant_id: str) -> list[Project]:
-        return list(self.db.scalars(select(Project).where(Project.tenant_id == tenant_id)).all())
-
     def dashboard(self, tenant_id: str, project_id: str) -> dict:
         project = self.db.get(Project, project_id)
         if not project or project.tenant_id != tenant_id:
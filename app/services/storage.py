@@ -1,10 +1,19 @@
 ﻿from __future__ import annotations
 
-import json
+import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Callable
+
+import orjson
 
 from app.core.config import get_settings
 
+try:
+    import msgpack
+except Exception:  # pragma: no cover
+    msgpack = None
+
 
 class ArtifactStore:
     def __init__(self) -> None:
@@ -41,27 +50,71 @@ class ArtifactStore:
         return path
 
 
-def write_json(path: Path, payload: dict | list) -> None:
+def write_json(path: Path, payload: dict | list, *, indent: bool = True) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    # NON_STR_KEYS and SERIALIZE_NUMPY keep parity with what json.dumps accepted.
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    path.write_bytes(orjson.dumps(payload, option=option))
 
 
-def write_jsonl(path: Path, records: list[dict]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as handle:
-        for record in records:
-            handle.write(json.dumps(record, ensure_ascii=True) + "\n")
+def packed_path(path: Path | str) -> Path:
+    return Path(path).with_suffix(".msgpack")
+
+
+def write_document(path: Path, payload: dict) -> None:
+    # Normalized payloads carry the full document text and are only read by code, so skip indentation.
+    write_json(path, payload, indent=False)
+    if msgpack is not None:
+        # Binary sidecar that loads several times faster; the JSON file stays the canonical copy.
+        packed_path(path).write_bytes(msgpack.packb(payload, use_bin_type=True))
+
+
+def read_json(path: Path | str) -> dict | list:
+    # orjson parses the raw bytes directly, skipping the intermediate decoded str.
+    return orjson.loads(Path(path).read_bytes())
+
+
+# Parsed normalized documents keyed by (path, mtime_ns); rewriting a file changes its mtime and
+# misses the cache. Entries are shared between callers and must be treated as read-only.
+_document_cache: Callable[[str, int], dict] | None = None
+
+
+def read_document(path: Path | str) -> dict:
+    global _document_cache
+    if _document_cache is None:
+        _document_cache = lru_cache(maxsize=get_settings().document_cache_size)(_load_document)
+    path = str(path)
+    return _document_cache(path, os.stat(path).st_mtime_ns)
+
+
+def _load_document(path: str, mtime_ns: int) -> dict:
+    if msgpack is not None:
+        try:
+            sidecar = packed_path(path)
+            # A sidecar older than the JSON is stale; fall back to the canonical file.
+            if sidecar.stat().st_mtime_ns >= mtime_ns:
+                return msgpack.unpackb(sidecar.read_bytes(), raw=False)
+        except (OSError, ValueError):
+            pass
+    return read_json(path)
+
+
+def reset_document_cache() -> None:
+    global _document_cache
+    _document_cache = None
 
 
 def read_jsonl(path: Path) -> list[dict]:
     if not path.exists():
         return []
     rows: list[dict] = []
-    with path.open("r", encoding="utf-8") as handle:
+    with path.open("rb") as handle:
         for line in handle:
             line = line.strip()
             if not line:
                 continue
-            rows.append(json.loads(line))
+            rows.append(orjson.loads(line))
     return rows
 
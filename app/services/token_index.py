@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-zA-Z0-9]{2,}")
+MAX_SECTIONS = 15
+
+
+@lru_cache(maxsize=65536)
+def token_hash(token: str) -> int:
+    # Stable across processes (unlike hash()), so indexes can be persisted next to the documents.
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def token_hashes(text: str) -> np.ndarray:
+    # Sorted, de-duplicated uint64 hashes of the text's tokens.
+    tokens = set(tokenize(text))
+    return np.unique(np.fromiter((token_hash(token) for token in tokens), dtype=np.uint64, count=len(tokens)))
+
+
+def candidate_chunks(payload: dict) -> list[str]:
+    sections = payload.get("sections") or []
+    return [section.get("content", "") for section in sections[:MAX_SECTIONS]] or [payload.get("text", "")]
+
+
+def build_token_index(chunks: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    # CSR layout: hashes of chunk i live in flat[offsets[i]:offsets[i + 1]].
+    per_chunk = [token_hashes(chunk) for chunk in chunks]
+    offsets = np.zeros(len(per_chunk) + 1, dtype=np.int64)
+    np.cumsum([len(hashes) for hashes in per_chunk], out=offsets[1:])
+    flat = np.concatenate(per_chunk) if per_chunk else np.empty(0, dtype=np.uint64)
+    return flat.astype(np.uint64, copy=False), offsets
+
+
+def chunk_overlaps(query: np.ndarray, flat: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # Number of distinct query tokens present in each chunk, computed for all chunks in one pass.
+    # flat repeats hashes shared between chunks, so it must not be passed as assume_unique.
+    hits = np.isin(flat, query).astype(np.int64)
+    cumulative = np.concatenate(([0], np.cumsum(hits)))
+    return cumulative[offsets[1:]] - cumulative[offsets[:-1]]
+
+
+def index_path(normalized_path: Path | str) -> Path:
+    return Path(normalized_path).with_suffix(".tokens.npz")
+
+
+def write_token_index(normalized_path: Path | str, payload: dict) -> tuple[np.ndarray, np.ndarray]:
+    flat, offsets = build_token_index(candidate_chunks(payload))
+    path = index_path(normalized_path)
+    # Write-then-rename so a concurrent reader never sees a half-written index.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as handle:
+        np.savez(handle, flat=flat, offsets=offsets)
+    os.replace(tmp_path, path)
+    return flat, offsets
+
+
+def load_token_index(normalized_path: Path | str, payload: dict) -> tuple[np.ndarray, np.ndarray]:
+    path = index_path(normalized_path)
+    try:
+        # An index older than its normalized document is stale and gets rebuilt below.
+        if path.stat().st_mtime_ns >= Path(normalized_path).stat().st_mtime_ns:
+            with np.load(path) as data:
+                return data["flat"], data["offsets"]
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        return write_token_index(normalized_path, payload)
+    except OSError:
+        return build_token_index(candidate_chunks(payload))
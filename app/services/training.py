@@ -108,9 +108,6 @@ class TrainingOrchestrator:
         )
         self.db.add(run)
         self.db.commit()
-        self.db.refresh(run)
-        self._record_run_event(run, from_state=None, to_state=RunState.QUEUED, message="Run queued")
-
         log_audit_event(
             self.db,
             tenant_id=tenant_id,
@@ -121,13 +118,13 @@ class TrainingOrchestrator:
             entity_id=run.id,
             details={"base_model_id": base_model_id, "vram_estimate": estimate},
         )
+        self._record_run_event(run, from_state=None, to_state=RunState.QUEUED, message="Run queued")
         return run
 
     def cancel_run(self, run: TrainingRun, user_id: str | None = None) -> TrainingRun:
         if run.state in {RunState.READY, RunState.FAILED, RunState.CANCELLED}:
             return run
         self._transition(run, RunState.CANCELLED, "Run cancelled by user")
-        self.db.commit()
         log_audit_event(
             self.db,
             tenant_id=run.tenant_id,
@@ -138,6 +135,7 @@ class TrainingOrchestrator:
             entity_id=run.id,
             details={},
         )
+        self.db.commit()
         return run
 
     def retry_run(self, run: TrainingRun, user_id: str | None = None) -> TrainingRun:
@@ -146,7 +144,6 @@ class TrainingOrchestrator:
         self._transition(run, RunState.QUEUED, "Retry queued")
         run.progress = 0.0
         run.error_message = None
-        self.db.commit()
         log_audit_event(
             self.db,
             tenant_id=run.tenant_id,
@@ -157,6 +154,7 @@ class TrainingOrchestrator:
             entity_id=run.id,
             details={},
         )
+        self.db.commit()
         return run
 
     def process_next_queued_run(self) -> TrainingRun | None:
@@ -260,8 +258,6 @@ class TrainingOrchestrator:
             run.progress = 1.0
 
             self._transition(run, RunState.READY, "Run complete")
-            self.db.commit()
-
             log_audit_event(
                 self.db,
                 tenant_id=run.tenant_id,
@@ -272,6 +268,7 @@ class TrainingOrchestrator:
                 entity_id=run.id,
                 details={"eval_report_id": run.eval_report_id, "package_path": run.package_path},
             )
+            self.db.commit()
             return run
         except Exception as exc:
             self._fail(run, str(exc))
@@ -291,6 +288,9 @@ class TrainingOrchestrator:
             raise ValueError("VRAM preflight failed")
 
     def _transition(self, run: TrainingRun, target_state: RunState, message: str | None = None) -> None:
+        # Sessions keep instances loaded after commit, so re-read the state another session
+        # (e.g. a cancel request) may have changed while this run was being processed.
+        self.db.refresh(run, ["state"])
         if target_state not in ALLOWED_TRANSITIONS.get(run.state, set()):
             raise ValueError(f"Invalid transition from {run.state} to {target_state}")
         from_state = run.state
@@ -321,6 +321,7 @@ class TrainingOrchestrator:
         self.db.commit()
 
     def _fail(self, run: TrainingRun, error: str) -> None:
+        self.db.refresh(run, ["state"])
         if run.state != RunState.FAILED:
             if RunState.FAILED not in ALLOWED_TRANSITIONS.get(run.state, set()):
                 previous_state = run.state
@@ -336,9 +337,6 @@ class TrainingOrchestrator:
                 self._transition(run, RunState.FAILED, "Run failed")
         run.error_message = error
         run.state_message = "Run failed"
-        self.db.commit()
-        RUN_FAILURES.inc()
-
         log_audit_event(
             self.db,
             tenant_id=run.tenant_id,
@@ -349,3 +347,5 @@ class TrainingOrchestrator:
             entity_id=run.id,
             details={"error": error},
         )
+        self.db.commit()
+        RUN_FAILURES.inc()
@@ -16,11 +16,13 @@ def client(tmp_path: Path):
     os.environ["ENABLE_BACKGROUND_WORKER"] = "false"
     os.environ["SESSION_SECRET"] = "test-secret"
 
-    from app.core.config import get_settings
+    from app.core.config import reset_settings_cache
     from app.core.db import reset_db_cache
+    from app.services.storage import reset_document_cache
 
-    get_settings.cache_clear()
+    reset_settings_cache()
     reset_db_cache()
+    reset_document_cache()
 
     from app.main import create_app
 
@@ -84,3 +86,111 @@ def test_exact_duplicate_is_rejected(client: TestClient):
             assert response.json()["status"] == "rejected"
             assert response.json()["near_duplicate_of"] is not None
 
+
+def test_chunk_overlaps_match_set_intersection_for_long_questions():
+    from app.services.token_index import build_token_index, chunk_overlaps, token_hashes, tokenize
+
+    # Overlapping 50-word windows share most hashes, and a 50-token question pushes numpy onto
+    # its sort-based isin path.
+    words = [f"term{idx}" for idx in range(120)]
+    chunks = [" ".join(words[start : start + 50]) for start in range(0, 80, 10)]
+    question = " ".join(words[70:120])
+
+    flat, offsets = build_token_index(chunks)
+    overlaps = chunk_overlaps(token_hashes(question), flat, offsets)
+
+    expected = [len(set(tokenize(chunk)) & set(tokenize(question))) for chunk in chunks]
+    assert overlaps.tolist() == expected
+
+
+def test_html_inline_tags_do_not_split_sentences():
+    pytest.importorskip("selectolax")
+    from app.services.ingest import IngestionService
+
+    html = b"<h2>Scope:</h2><p>Refunds are <b>not</b> allowed.</p><script>var x = 1;</script><p>Use &amp; log.</p>"
+    service = IngestionService(None)  # text extraction never touches the session
+    text, _meta = service._extract_text(html, "html")
+    lines = [line for line in service._normalize_text(text).splitlines() if line]
+
+    assert lines == ["Scope:", "Refunds are not allowed.", "Use & log."]
+
+
+def test_near_duplicate_search_matches_exact_scan(client: TestClient):
+    import random
+
+    import numpy as np
+    from sqlalchemy import select
+
+    from app.core.db import get_session_maker
+    from app.models import Document
+    from app.services.ingest import IngestionService
+    from app.services.storage import read_document
+
+    headers, project_id = bootstrap(client)
+    rng = random.Random(7)
+    vocabulary = [f"policy{idx}" for idx in range(5000)]
+    base = [rng.choice(vocabulary) for _ in range(300)]
+    texts = [
+        # Documents drift progressively further from the base text.
+        " ".join(word if rng.random() > idx / 12 else rng.choice(vocabulary) for word in base)
+        for idx in range(12)
+    ]
+    # Unrelated documents land far outside the fingerprint radius and are never scored exactly.
+    texts += [" ".join(f"unrelated{rng.randrange(5000)}" for _ in range(300)) for _ in range(3)]
+    for idx, text in enumerate(texts):
+        files = {"file": (f"doc{idx}.txt", io.BytesIO(text.encode("utf-8")), "text/plain")}
+        response = client.post(
+            f"/api/v1/projects/{project_id}/documents/upload",
+            files=files,
+            data={"metadata": "{}"},
+            headers=headers,
+        )
+        assert response.status_code == 200, response.text
+
+    with get_session_maker()() as db:
+        service = IngestionService(db)
+        docs = db.scalars(select(Document).where(Document.project_id == project_id)).all()
+        tenant_id = docs[0].tenant_id
+        for drift in (0.05, 0.3, 0.6):
+            query_text = " ".join(word if rng.random() > drift else rng.choice(vocabulary) for word in base)
+            embedding = service._hashed_embedding(query_text)
+            exact = {
+                doc.id: float(embedding @ service._hashed_embedding(read_document(doc.normalized_text_path)["text"]))
+                for doc in docs
+            }
+            best_id = max(exact, key=exact.get)
+            for threshold in (0.3, 0.6, 0.9):
+                service.settings = service.settings.model_copy(update={"near_duplicate_threshold": threshold})
+                found, score = service._find_near_duplicate(
+                    tenant_id=tenant_id,
+                    project_id=project_id,
+                    embedding=embedding,
+                    simhash=service._simhash(embedding),
+                )
+                if exact[best_id] >= threshold:
+                    assert found == best_id
+                    assert np.isclose(score, exact[best_id], atol=1e-5)
+                else:
+                    assert found is None
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Email jane.doe@example.com today.", [("email", "jane.doe@example.com")]),
+        ("SSN 123-45-6789 on file.", [("ssn", "123-45-6789")]),
+        ("Call 555-123-4567 or +1 (555) 123-4567.", [("phone", "555-123-4567"), ("phone", "+1 (555) 123-4567")]),
+        # A card number is reported once as a card, not again as the phone-shaped runs inside it.
+        ("Card 4111 1111 1111 1111 charged.", [("card", "4111 1111 1111 1111")]),
+        (
+            "Card 4111-1111-1111-1111, call 555-123-4567, ssn 123-45-6789, mail a@b.io",
+            [("card", "4111-1111-1111-1111"), ("phone", "555-123-4567"), ("ssn", "123-45-6789"), ("email", "a@b.io")],
+        ),
+        ("Order 2024 shipped in 3 boxes.", []),
+    ],
+)
+def test_detect_pii_reports_one_hit_per_span(text: str, expected: list[tuple[str, str]]):
+    from app.services.ingest import IngestionService
+
+    hits = IngestionService._detect_pii(text)
+    assert [(hit["type"], hit["value"]) for hit in hits] == expected
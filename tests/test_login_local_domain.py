@@ -14,11 +14,13 @@ def client(tmp_path: Path):
     os.environ["ENABLE_BACKGROUND_WORKER"] = "false"
     os.environ["SESSION_SECRET"] = "test-secret"
 
-    from app.core.config import get_settings
+    from app.core.config import reset_settings_cache
     from app.core.db import reset_db_cache
+    from app.services.storage import reset_document_cache
 
-    get_settings.cache_clear()
+    reset_settings_cache()
     reset_db_cache()
+    reset_document_cache()
 
     from app.main import create_app
 
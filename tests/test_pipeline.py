@@ -16,11 +16,13 @@ def client(tmp_path: Path):
     os.environ["ENABLE_BACKGROUND_WORKER"] = "false"
     os.environ["SESSION_SECRET"] = "test-secret"
 
-    from app.core.config import get_settings
+    from app.core.config import reset_settings_cache
     from app.core.db import reset_db_cache
+    from app.services.storage import reset_document_cache
 
-    get_settings.cache_clear()
+    reset_settings_cache()
     reset_db_cache()
+    reset_document_cache()
 
     from app.main import create_app
 
@@ -139,3 +141,123 @@ def test_end_to_end_pipeline(client: TestClient):
     assert audit.status_code == 200, audit.text
     assert len(audit.json()) >= 4
 
+    first_page = client.get(f"/api/v1/projects/{project_id}/audit?limit=2", headers=headers)
+    assert first_page.status_code == 200, first_page.text
+    assert len(first_page.json()) == 2
+    cursor = first_page.headers["X-Next-Cursor"]
+    second_page = client.get(f"/api/v1/projects/{project_id}/audit?limit=2&cursor={cursor}", headers=headers)
+    assert second_page.status_code == 200, second_page.text
+    seen = [item["id"] for item in first_page.json() + second_page.json()]
+    assert seen == [item["id"] for item in audit.json()[: len(seen)]]
+
+    bad_cursor = client.get(f"/api/v1/projects/{project_id}/audit?cursor=not-a-cursor", headers=headers)
+    assert bad_cursor.status_code == 400
+
+
+def _bootstrap_project(client: TestClient) -> tuple[dict, str]:
+    token = client.post(
+        "/api/v1/auth/register",
+        json={"email": f"builder-{uuid4().hex[:8]}@example.com", "password": "strongpass123"},
+    ).json()["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    tenant_id = client.post(
+        "/api/v1/tenants",
+        json={"name": f"tenant-{uuid4().hex[:8]}", "namespace": f"tenant-{uuid4().hex[:8]}"},
+        headers=auth,
+    ).json()["id"]
+    headers = {**auth, "X-Tenant-Id": tenant_id}
+    project_id = client.post(
+        "/api/v1/projects",
+        json={"name": "Dataset Project", "description": "desc"},
+        headers=headers,
+    ).json()["id"]
+    return headers, project_id
+
+
+def _dataset_lines(dataset_id: str) -> dict[str, list[bytes]]:
+    from app.core.db import get_session_maker
+    from app.models import DatasetVersion
+
+    with get_session_maker()() as db:
+        dataset = db.get(DatasetVersion, dataset_id)
+        paths = {
+            "train": dataset.train_path,
+            "val": dataset.val_path,
+            "test": dataset.test_path,
+            "gold": dataset.gold_path,
+            "review": dataset.review_path,
+        }
+    return {split: Path(path).read_bytes().splitlines() for split, path in paths.items()}
+
+
+def test_parallel_dataset_build_matches_single_process(client: TestClient):
+    from app.core.config import reset_settings_cache
+
+    headers, project_id = _bootstrap_project(client)
+    for index in range(120):
+        text = (
+            f"# Procedure {index}\n"
+            f"Shipments for region {index} leave the warehouse within {index % 9 + 1} days. "
+            f"Escalate delays for account {index * 37} to the regional lead.\n"
+            f"1. Confirm order {index}. 2. Notify carrier {index % 13}. 3. Close ticket {index * 11}."
+        ).encode("utf-8")
+        upload = client.post(
+            f"/api/v1/projects/{project_id}/documents/upload",
+            files={"file": (f"procedure-{index}.txt", io.BytesIO(text), "text/plain")},
+            data={"metadata": "{}"},
+            headers=headers,
+        )
+        assert upload.status_code == 200, upload.text
+
+    builds = {}
+    for workers in ("1", "2"):
+        os.environ["DATASET_WORKERS"] = workers
+        reset_settings_cache()
+        try:
+            dataset = client.post(
+                f"/api/v1/projects/{project_id}/datasets",
+                json={"name": f"dataset-{workers}"},
+                headers=headers,
+            )
+        finally:
+            os.environ.pop("DATASET_WORKERS")
+            reset_settings_cache()
+        assert dataset.status_code == 200, dataset.text
+        builds[workers] = dataset.json()
+
+    single, parallel = builds["1"], builds["2"]
+    assert len(single["source_document_ids"]) >= 100
+    for key in ("train_examples", "val_examples", "test_examples", "gold_examples", "review_examples", "total_examples", "task_mix"):
+        assert parallel["stats_json"][key] == single["stats_json"][key]
+    assert _dataset_lines(parallel["id"]) == _dataset_lines(single["id"])
+
+
+def test_small_dataset_promotes_train_rows_without_duplicates(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    from app.services.dataset import DatasetBuilderService
+
+    # The bucket is a hash of the random document id; pin it so the fallback always runs.
+    monkeypatch.setattr(DatasetBuilderService, "_split_bucket", staticmethod(lambda doc_id: "train"))
+    headers, project_id = _bootstrap_project(client)
+    text = b"# Returns\nReturns are accepted within 30 days. Escalate disputes to the support lead."
+    upload = client.post(
+        f"/api/v1/projects/{project_id}/documents/upload",
+        files={"file": ("returns.txt", io.BytesIO(text), "text/plain")},
+        data={"metadata": "{}"},
+        headers=headers,
+    )
+    assert upload.status_code == 200, upload.text
+
+    dataset = client.post(
+        f"/api/v1/projects/{project_id}/datasets",
+        json={"name": "small"},
+        headers=headers,
+    )
+    assert dataset.status_code == 200, dataset.text
+    stats = dataset.json()["stats_json"]
+    lines = _dataset_lines(dataset.json()["id"])
+
+    for split in ("train", "val", "test", "gold", "review"):
+        assert len(lines[split]) == stats[f"{split}_examples"]
+    assert stats["val_examples"] >= 1 and stats["test_examples"] >= 1
+    split_rows = lines["train"] + lines["val"] + lines["test"]
+    assert len(set(split_rows)) == len(split_rows)
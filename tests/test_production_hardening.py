@@ -17,11 +17,13 @@ def client(tmp_path: Path):
     os.environ["SESSION_SECRET"] = "test-secret"
     os.environ["ENABLE_METRICS"] = "true"
 
-    from app.core.config import get_settings
+    from app.core.config import reset_settings_cache
     from app.core.db import reset_db_cache
+    from app.services.storage import reset_document_cache
 
-    get_settings.cache_clear()
+    reset_settings_cache()
     reset_db_cache()
+    reset_document_cache()
 
     from app.main import create_app
 
@@ -87,18 +89,16 @@ def test_tenant_plan_defaults_and_update(client: TestClient):
     assert payload["max_documents"] >= 5000
 
 
-def test_document_quota_enforced(client: TestClient):
-    headers, tenant_id = auth_bootstrap(client)
+def test_document_quota_enforced(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    headers, _tenant_id = auth_bootstrap(client)
     project_id = create_project(client, headers)
 
-    from app.core.db import get_session_maker
-    from app.models import TenantPlan
+    from dataclasses import replace
+
+    from app.models import PlanTier
+    from app.models.domain import PLAN_LIMITS
 
-    session_maker = get_session_maker()
-    with session_maker() as db:
-        plan = db.query(TenantPlan).filter(TenantPlan.tenant_id == tenant_id).one()
-        plan.max_documents = 1
-        db.commit()
+    monkeypatch.setitem(PLAN_LIMITS, PlanTier.STARTER, replace(PLAN_LIMITS[PlanTier.STARTER], max_documents=1))
 
     file_one = {"file": ("doc1.txt", io.BytesIO(b"policy one"), "text/plain")}
     upload_one = client.post(
@@ -177,3 +177,71 @@ def test_run_events_and_metrics_available(client: TestClient):
     metrics = client.get("/api/v1/metrics")
     assert metrics.status_code == 200
     assert "lora_studio_requests_total" in metrics.text
+
+
+def test_unmatched_paths_share_one_metrics_label(client: TestClient):
+    from prometheus_client import generate_latest
+
+    assert client.get("/api/v1/nonexistent/xyz").status_code == 404
+
+    # Read the registry directly: the scrape endpoint may serve a render cached earlier this second.
+    exposition = generate_latest().decode("utf-8")
+    assert 'endpoint="<unmatched>"' in exposition
+    assert "/api/v1/nonexistent/xyz" not in exposition
+
+
+def test_cancel_during_processing_is_not_overwritten(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    from app.core.db import get_session_maker
+    from app.models import TrainingRun
+    from app.services.training import TrainingOrchestrator
+    from app.services.training_engine import TrainingEngine
+
+    headers, _tenant_id = auth_bootstrap(client)
+    project_id = create_project(client, headers)
+    upload = client.post(
+        f"/api/v1/projects/{project_id}/documents/upload",
+        files={"file": ("policy.txt", io.BytesIO(b"Returns within 30 days with receipt."), "text/plain")},
+        data={"metadata": "{}"},
+        headers=headers,
+    )
+    assert upload.status_code == 200, upload.text
+    dataset = client.post(f"/api/v1/projects/{project_id}/datasets", json={"name": "ds-v1"}, headers=headers)
+    assert dataset.status_code == 200, dataset.text
+    run = client.post(
+        f"/api/v1/projects/{project_id}/runs",
+        json={
+            "dataset_version_id": dataset.json()["id"],
+            "base_model_id": "mistralai/Mistral-7B-Instruct-v0.3",
+            "data_rights_confirmed": True,
+            "config": {"lora_rank": 16, "lora_alpha": 32, "sequence_length": 1024, "use_4bit": True},
+        },
+        headers=headers,
+    )
+    assert run.status_code == 200, run.text
+    run_id = run.json()["id"]
+
+    original_run = TrainingEngine.run
+
+    def cancel_while_training(self, **kwargs):
+        # Another session cancels the run while the orchestrator is mid-training.
+        with get_session_maker()() as other:
+            TrainingOrchestrator(other).cancel_run(other.get(TrainingRun, run_id))
+        return original_run(self, **kwargs)
+
+    monkeypatch.setattr(TrainingEngine, "run", cancel_while_training)
+    process = client.post("/api/v1/runs/process-next", headers=headers)
+    assert process.status_code == 200, process.text
+    assert process.json()["state"] != "ready"
+
+    events = client.get(f"/api/v1/runs/{run_id}/events", headers=headers)
+    states = [row["to_state"] for row in events.json()]
+    assert "cancelled" in states
+    assert not {"evaluating", "packaging", "ready"} & set(states)
+
+
+def test_sqlite_connections_use_wal(client: TestClient):
+    from app.core.db import get_engine
+
+    with get_engine().connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1